@@ -2,25 +2,64 @@
 應用初始化模塊
 """
 import os
+import queue
+import atexit
+import importlib
 import logging
-from logging.handlers import RotatingFileHandler
-import asyncio
-from flask.json import jsonify
-from werkzeug.exceptions import HTTPException
-from asgiref.wsgi import WsgiToAsgi
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
-# 加載環境變量
-from dotenv import load_dotenv
-load_dotenv()
+# 加載環境變量（生產環境由部署環境提供，不查找 .env 文件）
+if os.environ.get('FLASK_ENV') != 'production':
+    from dotenv import load_dotenv
+    load_dotenv()
 
-from flask import Flask
+from flask import Flask, current_app
 from flask_cors import CORS
 from flask_caching import Cache
-from .models.base import db
+from .models.base import db, commit_session
+from .utils.response_cache import ResponseCache
+from .services.airport_directory import AirportDirectory
 
 # 初始化緩存
 cache = Cache()
 
+# 航空公司列表的進程內響應緩存，同步航空公司數據後清除
+airline_cache = ResponseCache(timeout=3600)
+
+# 進程內機場目錄及機場查詢（ID/國家/城市）的響應緩存，同步機場數據後清除
+airport_directory = AirportDirectory(timeout=7200)
+airport_cache = ResponseCache(timeout=7200)
+
+# 有航班的出發地/目的地機場的進程內響應緩存，導入航班數據後清除；
+# 命令列同步在其他進程執行，因此保留較短的有效時間
+route_airport_cache = ResponseCache(timeout=600)
+
+# 日誌背景寫入線程，由 setup_logging 啟動
+log_listener = None
+
+# 運行環境，於導入時解析一次
+FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
+
+# 設置 PROFILE 環境變量時啟用請求分析與慢查詢記錄
+PROFILE = bool(os.environ.get('PROFILE'))
+
+# 跨域設置 - 允許所有來源訪問 API
+CORS_RESOURCES = {
+    r"/api/*": {
+        "origins": "*",
+        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        "allow_headers": ["Content-Type", "Authorization"]
+    }
+}
+
+# 藍圖註冊表: (模塊路徑, 藍圖屬性名, URL前綴)
+BLUEPRINTS = [
+    ('.controllers.airline', 'airline_bp', '/api/airlines'),
+    ('.controllers.airport', 'airport_bp', '/api/airports'),
+    ('.controllers.flight', 'flight_bp', '/api/flights'),
+    ('.controllers.ticket_price', 'ticket_price_bp', '/api/ticket-prices'),
+]
+
 def create_app(config_name=None):
     """
     創建並初始化Flask應用
@@ -35,21 +74,27 @@ def create_app(config_name=None):
     
     # 配置應用
     if not config_name:
-        config_name = os.environ.get('FLASK_ENV', 'development')
+        config_name = FLASK_ENV
     
     if config_name == 'production':
         app.config.from_object('config.production')
     else:
         app.config.from_object('config.base')
     
-    # 設置跨域 - 允許所有來源訪問
-    CORS(app, resources={r"/api/*": {"origins": "*", 
-                                     "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-                                     "allow_headers": ["Content-Type", "Authorization"]}})
+    # 設置跨域 - 僅在請求帶有 Origin 時回傳跨域標頭
+    CORS(app, resources=CORS_RESOURCES, send_wildcard=False)
+    
+    # JSON輸出不排序鍵名，省去大型列表中每個字典的排序成本
+    app.json.sort_keys = False
     
     # 初始化數據庫
+    from .database.db import SQLALCHEMY_ENGINE_OPTIONS
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', SQLALCHEMY_ENGINE_OPTIONS)
     db.init_app(app)
     
+    # 請求內的數據庫寫入於請求結束時統一提交
+    app.after_request(commit_session)
+    
     # 初始化緩存
     cache.init_app(app)
     
@@ -62,23 +107,17 @@ def create_app(config_name=None):
     # 註冊錯誤處理
     register_error_handlers(app)
     
-    # 支持異步路由函數
-    app.before_request_funcs.setdefault(None, []).append(setup_async_context)
+    # 性能分析
+    if PROFILE:
+        from .utils.profiling import setup_profiling
+        setup_profiling(app)
     
+    # 異步路由函數由 Flask 內建的 async_to_sync 處理，無需在每個請求前設置事件循環
     return app
 
-def setup_async_context():
-    """設置異步上下文"""
-    try:
-        # 嘗試獲取或創建事件循環
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        # 沒有事件循環，創建一個新的
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
 def setup_logging(app):
-    """設置日誌配置"""
+    """設置日誌配置，日誌經隊列交由背景線程寫入檔案與控制台"""
+    global log_listener
     log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
@@ -100,66 +139,53 @@ def setup_logging(app):
     file_handler.setFormatter(formatter)
     file_handler.setLevel(log_level)
     
-    # 清除現有處理器
-    for handler in app.logger.handlers[:]:
-        app.logger.removeHandler(handler)
-        
-    # 添加新處理器
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(log_level)
-    
     # 同時輸出到控制台
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     console_handler.setLevel(log_level)
-    app.logger.addHandler(console_handler)
     
-    # 設置根記錄器
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-    
-    # 清除根記錄器現有處理器
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
-        
-    # 將相同的處理器添加到根記錄器
-    root_file_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'app.log'),
-        maxBytes=10000000,
-        backupCount=5,
-        encoding='utf-8',
-        mode='a'
-    )
-    root_file_handler.setFormatter(formatter)
-    root_file_handler.setLevel(log_level)
-    root_logger.addHandler(root_file_handler)
+    # 請求線程只將日誌放入隊列，磁碟寫入與檔案輪替由背景線程處理
+    if log_listener is not None:
+        log_listener.stop()
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_listener.start()
+    queue_handler = QueueHandler(log_queue)
     
-    root_console_handler = logging.StreamHandler()
-    root_console_handler.setFormatter(formatter)
-    root_console_handler.setLevel(log_level)
-    root_logger.addHandler(root_console_handler)
+    # 應用記錄器與根記錄器共用同一個隊列處理器，避免重複開啟 app.log
+    root_logger = logging.getLogger()
+    for logger in (app.logger, root_logger):
+        # 清除現有處理器
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+        logger.setLevel(log_level)
+    
+    # 應用日誌已直接寫入處理器，不再向根記錄器傳遞以免重複寫入
+    app.logger.propagate = False
+
+@atexit.register
+def stop_log_listener():
+    """進程結束前寫出隊列中剩餘的日誌"""
+    if log_listener is not None:
+        log_listener.stop()
 
 def register_blueprints(app):
-    """註冊所有藍圖"""
-    # 導入藍圖
-    from .controllers.airline import airline_bp
-    from .controllers.airport import airport_bp
-    from .controllers.flight import flight_bp
-    from .controllers.ticket_price import ticket_price_bp
-    
-    # 註冊藍圖
-    app.register_blueprint(airline_bp, url_prefix='/api/airlines')
-    app.register_blueprint(airport_bp, url_prefix='/api/airports')
-    app.register_blueprint(flight_bp, url_prefix='/api/flights')
-    app.register_blueprint(ticket_price_bp, url_prefix='/api/ticket-prices')
+    """註冊所有藍圖（註冊時才導入控制器模塊）"""
+    for module_path, attr, url_prefix in BLUEPRINTS:
+        module = importlib.import_module(module_path, __name__)
+        app.register_blueprint(getattr(module, attr), url_prefix=url_prefix)
+
+def not_found(error):
+    """404 錯誤處理"""
+    return {'error': 'Not found'}, 404
+
+def server_error(error):
+    """500 錯誤處理"""
+    current_app.logger.error(error)
+    return {'error': 'Internal server error'}, 500
 
 def register_error_handlers(app):
     """註冊錯誤處理器"""
-    @app.errorhandler(404)
-    def not_found(error):
-        return {'error': 'Not found'}, 404
-    
-    @app.errorhandler(500)
-    def server_error(error):
-        app.logger.error(error)
-        return {'error': 'Internal server error'}, 500
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, server_error)
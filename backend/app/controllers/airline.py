@@ -3,92 +3,93 @@
 處理與航空公司相關的API請求
 """
 from flask import Blueprint, jsonify, request
+from sqlalchemy import bindparam, select
 from ..models import Airline
-from .. import cache
+from ..models.base import db, fetch_rows
+from .. import airline_cache
 from flask import current_app
 
 # 創建藍圖
 airline_bp = Blueprint('airline', __name__)
 
+# 航空公司輸出欄位，輸出鍵名直接由SQL標籤決定，不建立ORM實例
+AIRLINE_COLUMNS = (
+    Airline.airline_id.label('id'), Airline.name_zh, Airline.name_en,
+    Airline.is_domestic, Airline.website, Airline.contact_phone
+)
+
+# 國內/國際列表不包含 is_domestic 欄位
+AIRLINE_BRIEF_COLUMNS = tuple(column for column in AIRLINE_COLUMNS if column.key != 'is_domestic')
+
+# 預先建立的查詢語句，請求時只需綁定參數
+ALL_AIRLINES_QUERY = select(*AIRLINE_COLUMNS)
+DOMESTIC_AIRLINES_QUERY = select(*AIRLINE_BRIEF_COLUMNS).where(Airline.is_domestic.is_(True))
+INTERNATIONAL_AIRLINES_QUERY = select(*AIRLINE_BRIEF_COLUMNS).where(Airline.is_domestic.is_(False))
+AIRLINE_BY_ID_QUERY = select(*AIRLINE_COLUMNS).where(Airline.airline_id == bindparam('airline_id'))
+
+# 中英文名稱模糊搜索
+AIRLINE_SEARCH_QUERY = select(*AIRLINE_COLUMNS).where(Airline.name_filter(bindparam('pattern')))
+
 @airline_bp.route('/', methods=['GET'])
-@cache.cached(timeout=3600)  # 緩存1小時
 def get_airlines():
     """獲取所有航空公司"""
+    body = airline_cache.get('all')
+    if body is not None:
+        return airline_cache.response(body)
+    
     try:
-        airlines = Airline.query.all()
-        result = []
-        for airline in airlines:
-            result.append({
-                'id': airline.airline_id,
-                'name_zh': airline.name_zh,
-                'name_en': airline.name_en,
-                'is_domestic': airline.is_domestic,
-                'website': airline.website,
-                'contact_phone': airline.contact_phone
-            })
-        return jsonify(result)
+        airlines = fetch_rows(ALL_AIRLINES_QUERY)
+        body = airline_cache.set('all', airlines)
+        return airline_cache.response(body)
     except Exception as e:
         current_app.logger.error(f"獲取航空公司列表失敗: {str(e)}")
         return jsonify({'error': '獲取航空公司列表失敗'}), 500
 
 @airline_bp.route('/domestic', methods=['GET'])
-@cache.cached(timeout=3600)  # 緩存1小時
 def get_domestic_airlines():
     """獲取所有國內航空公司"""
+    body = airline_cache.get('domestic')
+    if body is not None:
+        return airline_cache.response(body)
+    
     try:
-        airlines = Airline.get_domestic()
-        result = []
-        for airline in airlines:
-            result.append({
-                'id': airline.airline_id,
-                'name_zh': airline.name_zh,
-                'name_en': airline.name_en,
-                'website': airline.website,
-                'contact_phone': airline.contact_phone
-            })
-        return jsonify(result)
+        airlines = fetch_rows(DOMESTIC_AIRLINES_QUERY)
+        body = airline_cache.set('domestic', airlines)
+        return airline_cache.response(body)
     except Exception as e:
         current_app.logger.error(f"獲取國內航空公司失敗: {str(e)}")
         return jsonify({'error': '獲取國內航空公司失敗'}), 500
 
 @airline_bp.route('/international', methods=['GET'])
-@cache.cached(timeout=3600)  # 緩存1小時
 def get_international_airlines():
     """獲取所有國際航空公司"""
+    body = airline_cache.get('international')
+    if body is not None:
+        return airline_cache.response(body)
+    
     try:
-        airlines = Airline.get_international()
-        result = []
-        for airline in airlines:
-            result.append({
-                'id': airline.airline_id,
-                'name_zh': airline.name_zh,
-                'name_en': airline.name_en,
-                'website': airline.website,
-                'contact_phone': airline.contact_phone
-            })
-        return jsonify(result)
+        airlines = fetch_rows(INTERNATIONAL_AIRLINES_QUERY)
+        body = airline_cache.set('international', airlines)
+        return airline_cache.response(body)
     except Exception as e:
         current_app.logger.error(f"獲取國際航空公司失敗: {str(e)}")
         return jsonify({'error': '獲取國際航空公司失敗'}), 500
 
 @airline_bp.route('/<string:airline_id>', methods=['GET'])
-@cache.cached(timeout=3600)  # 緩存1小時
 def get_airline_by_id(airline_id):
     """根據ID獲取航空公司"""
+    cache_key = f'id:{airline_id}'
+    body = airline_cache.get(cache_key)
+    if body is not None:
+        return airline_cache.response(body)
+    
     try:
-        airline = Airline.query.get(airline_id)
+        airline = db.session.execute(AIRLINE_BY_ID_QUERY, {'airline_id': airline_id}).mappings().first()
         if not airline:
             return jsonify({'error': '找不到該航空公司'}), 404
         
-        result = {
-            'id': airline.airline_id,
-            'name_zh': airline.name_zh,
-            'name_en': airline.name_en,
-            'is_domestic': airline.is_domestic,
-            'website': airline.website,
-            'contact_phone': airline.contact_phone
-        }
-        return jsonify(result)
+        body = airline_cache.set(cache_key, dict(airline))
+        return airline_cache.response(body)
     except Exception as e:
         current_app.logger.error(f"獲取航空公司失敗: {str(e)}")
         return jsonify({'error': '獲取航空公司失敗'}), 500
@@ -102,26 +103,13 @@ def search_airlines():
     
     # 根據參數執行不同的查詢
     if name:
-        # 判斷使用中文還是英文搜索
-        lang = 'en' if all(ord(c) < 128 for c in name) else 'zh'
-        airlines = Airline.get_by_name(name, lang)
+        # 同時比對中英文名稱
+        airlines = fetch_rows(AIRLINE_SEARCH_QUERY, {'pattern': f"%{name}%"})
     elif country:
         # 因移除 country 欄位，現在返回空列表
         airlines = []
     else:
         return jsonify({'error': '請提供搜索參數'}), 400
     
-    # 轉換為JSON格式
-    result = []
-    for airline in airlines:
-        result.append({
-            'id': airline.airline_id,
-            'name_zh': airline.name_zh,
-            'name_en': airline.name_en,
-            # 已移除 country 欄位引用
-            'is_domestic': airline.is_domestic,
-            'website': airline.website,
-            'contact_phone': airline.contact_phone
-        })
-    
-    return jsonify(result) 
\ No newline at end of file
+    # 轉換為JSON格式（已移除 country 欄位引用）
+    return jsonify(airlines)
\ No newline at end of file
@@ -2,20 +2,148 @@
 航班控制器
 處理與航班相關的API請求
 """
+import asyncio
+import json
+import re
+import asyncpg
 from flask import Blueprint, jsonify, request, current_app
+from werkzeug.http import generate_etag
 from ..models import Flight, Airport, Airline
 from ..services.search_service import SearchService
 from ..services.data_sync_service import DataSyncService
+from ..database.db import acquire_read, get_db_url
+from ..utils.task_runner import TaskRunner
+from ..utils.json_stream import stream_json
+from ..utils.response_cache import etag_cached
 from .. import cache
 
 # 創建藍圖
 flight_bp = Blueprint('flight', __name__)
 
 # 台灣機場列表
-TAIWAN_AIRPORTS = ['TPE', 'TSA', 'RMQ', 'KHH', 'TNN', 'CYI', 'HUN', 'TTT', 'KNH', 'MZG', 'LZN', 'MFK', 'KYD', 'GNI', 'WOT', 'CMJ']
+TAIWAN_AIRPORTS = ('TPE', 'TSA', 'RMQ', 'KHH', 'TNN', 'CYI', 'HUN', 'TTT', 'KNH', 'MZG', 'LZN', 'MFK', 'KYD', 'GNI', 'WOT', 'CMJ')
+
+# 台灣出發查詢只考慮的主要機場
+TAIWAN_MAIN_AIRPORTS = ('TPE', 'TSA', 'KHH', 'RMQ', 'TNN')
+
+# 台灣出發查詢的最大並發數
+TAIWAN_SEARCH_CONCURRENCY = 5
 
 # 目標航空公司列表
-TARGET_AIRLINES = ['AE', 'B7', 'BR', 'CI', 'CX', 'DA', 'IT', 'JL', 'JX', 'OZ']
+TARGET_AIRLINES = ('AE', 'B7', 'BR', 'CI', 'CX', 'DA', 'IT', 'JL', 'JX', 'OZ')
+
+# 目標航空公司集合，供成員判斷使用
+TARGET_AIRLINE_SET = frozenset(TARGET_AIRLINES)
+
+# 熱門航線列表
+POPULAR_ROUTES = {
+    # 台灣國內熱門航線
+    'domestic': [
+        {'departure': 'TPE', 'arrival': 'KHH', 'name': '台北-高雄'},
+        {'departure': 'TSA', 'arrival': 'KHH', 'name': '台北-高雄'},
+        {'departure': 'TSA', 'arrival': 'RMQ', 'name': '台北-台中'},
+        {'departure': 'TSA', 'arrival': 'TNN', 'name': '台北-台南'},
+        {'departure': 'TSA', 'arrival': 'MZG', 'name': '台北-澎湖'},
+        {'departure': 'TSA', 'arrival': 'HUN', 'name': '台北-花蓮'},
+        {'departure': 'TSA', 'arrival': 'KNH', 'name': '台北-金門'}
+    ],
+    # 國際熱門航線
+    'international': [
+        {'departure': 'TPE', 'arrival': 'NRT', 'name': '台北-東京成田'},
+        {'departure': 'TPE', 'arrival': 'HND', 'name': '台北-東京羽田'},
+        {'departure': 'TPE', 'arrival': 'KIX', 'name': '台北-大阪'},
+        {'departure': 'TPE', 'arrival': 'ICN', 'name': '台北-首爾'},
+        {'departure': 'TPE', 'arrival': 'HKG', 'name': '台北-香港'},
+        {'departure': 'TPE', 'arrival': 'BKK', 'name': '台北-曼谷'},
+        {'departure': 'TPE', 'arrival': 'SIN', 'name': '台北-新加坡'},
+        {'departure': 'TPE', 'arrival': 'MNL', 'name': '台北-馬尼拉'}
+    ]
+}
+
+# 熱門航線為靜態數據，載入時序列化一次（格式與 jsonify 輸出一致）
+POPULAR_ROUTES_JSON = (json.dumps(POPULAR_ROUTES, separators=(',', ':')) + '\n').encode('utf-8')
+POPULAR_ROUTES_ETAG = generate_etag(POPULAR_ROUTES_JSON)
+
+# 航班詳情查詢：使用 asyncpg 直接查詢，票價以子查詢彙總為JSON陣列，一次往返取得全部資料
+FLIGHT_DETAIL_SQL = """
+    SELECT 
+        f.flight_id, 
+        f.flight_number, 
+        f.scheduled_departure, 
+        f.scheduled_arrival, 
+        f.status,
+        al.is_domestic,
+        a_dep.airport_id as departure_id, 
+        a_dep.name_zh as departure_name,
+        a_dep.city as departure_city,
+        a_dep.country as departure_country,
+        a_arr.airport_id as arrival_id, 
+        a_arr.name_zh as arrival_name,
+        a_arr.city as arrival_city,
+        a_arr.country as arrival_country,
+        al.airline_id, 
+        al.name_zh as airline_name,
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'class_type', tp.class_type,
+                'price', tp.base_price::float8,
+                'available_seats', tp.available_seats,
+                'updated_at', tp.price_updated_at
+            ))
+            FROM ticket_prices tp
+            WHERE tp.flight_id = f.flight_id
+        ), '[]') as prices
+    FROM 
+        flights f
+    JOIN 
+        airports a_dep ON f.departure_airport_id = a_dep.airport_id
+    JOIN 
+        airports a_arr ON f.arrival_airport_id = a_arr.airport_id
+    JOIN 
+        airlines al ON f.airline_id = al.airline_id
+    WHERE 
+        f.flight_id = $1
+    """
+
+# 數字查詢參數格式（整數或小數）
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+# 查詢參數中視為 true 的值
+TRUTHY_VALUES = frozenset({'true', 'True', 'TRUE', '1', 'yes', 'y', 'on'})
+
+# 搜索服務（無狀態，所有請求共用同一實例）
+search_service = SearchService()
+
+# 數據同步背景任務執行器（一次只執行一個同步任務）
+sync_task_runner = TaskRunner(max_workers=1)
+
+def flight_sort_key(flight):
+    """航班排序鍵：先按價格，再按出發時間"""
+    return flight['price']['amount'], flight['departure']['time']
+
+def is_number_arg(value):
+    """檢查可選的數字查詢參數，未提供時視為有效"""
+    return not value or NUMBER_PATTERN.fullmatch(value) is not None
+
+def parse_code_list(value):
+    """解析逗號分隔的代碼列表，去除空白及空項"""
+    if not value:
+        return ()
+    return tuple(code for code in (part.strip() for part in value.split(',')) if code)
+
+def route_cache_key(prefix):
+    """
+    目的地查詢的緩存鍵
+
+    只包含處理函數實際讀取的出發機場及日期，
+    其他查詢參數或參數順序不同的請求共用同一緩存
+    """
+    return f"{prefix}:{request.view_args['departure_code']}:{request.args.get('date') or ''}"
+
+def get_bool_arg(name, default=False):
+    """讀取布林查詢參數，未提供時返回默認值"""
+    value = request.args.get(name)
+    return default if value is None else value in TRUTHY_VALUES
 
 @flight_bp.route('/search', methods=['GET'])
 async def search_flights():
@@ -42,7 +170,7 @@ async def search_flights():
     price_min = request.args.get('price_min')
     price_max = request.args.get('price_max')
     class_type = request.args.get('class_type', '經濟')
-    only_target_airlines = request.args.get('only_target_airlines', 'true').lower() == 'true'
+    only_target_airlines = get_bool_arg('only_target_airlines', True)
     
     # 驗證必須參數
     if not departure or not arrival or not departure_date:
@@ -51,25 +179,19 @@ async def search_flights():
         }), 400
     
     # 處理航空公司參數
-    airlines = None
-    if airlines_str:
-        airlines = airlines_str.split(',')
-    elif only_target_airlines:
-        airlines = TARGET_AIRLINES.copy()
+    airlines = parse_code_list(airlines_str)
+    if not airlines:
+        airlines = TARGET_AIRLINES if only_target_airlines else None
     
     # 處理價格範圍
-    try:
-        if price_min:
-            price_min = float(price_min)
-        if price_max:
-            price_max = float(price_max)
-    except ValueError:
+    if not is_number_arg(price_min) or not is_number_arg(price_max):
         return jsonify({
             'error': '價格必須是數字'
         }), 400
-    
-    # 創建 SearchService 實例
-    search_service = SearchService()
+    if price_min:
+        price_min = float(price_min)
+    if price_max:
+        price_max = float(price_max)
     
     # 使用搜索服務進行查詢，加上 await 關鍵字
     result = await search_service.search_flights(
@@ -81,8 +203,9 @@ async def search_flights():
     # 檢查是否有錯誤
     if 'error' in result:
         return jsonify(result), 400
-        
-    return jsonify(result)
+    
+    # 結果可能包含大量航班，逐筆串流輸出
+    return stream_json(result)
 
 @flight_bp.route('/from_taiwan/<string:arrival_iata>', methods=['GET'])
 async def flights_from_taiwan(arrival_iata):
@@ -110,46 +233,46 @@ async def flights_from_taiwan(arrival_iata):
         }), 400
     
     # 處理航空公司參數
-    airlines = None
-    if airlines_str:
-        airlines = airlines_str.split(',')
-    else:
-        airlines = TARGET_AIRLINES.copy()
+    airlines = parse_code_list(airlines_str) or TARGET_AIRLINES
     
     # 處理價格範圍
-    try:
-        if price_min:
-            price_min = float(price_min)
-        if price_max:
-            price_max = float(price_max)
-    except ValueError:
+    if not is_number_arg(price_min) or not is_number_arg(price_max):
         return jsonify({
             'error': '價格必須是數字'
         }), 400
-    
-    # 創建 SearchService 實例
-    search_service = SearchService()
+    if price_min:
+        price_min = float(price_min)
+    if price_max:
+        price_max = float(price_max)
+    
+    # 同時查詢各主要機場出發的航班，總耗時取決於最慢的一個查詢；
+    # 以信號量限制同時佔用的數據庫連接數，機場列表增加時也不會耗盡連接池
+    semaphore = asyncio.Semaphore(TAIWAN_SEARCH_CONCURRENCY)
+    
+    async def search_from(departure):
+        async with semaphore:
+            return await search_service.search_flights(
+                departure, arrival_iata, departure_date, 
+                airlines, None,
+                price_min, price_max, class_type
+            )
+    
+    # 單一機場查詢失敗不取消其他查詢，失敗結果在下方記錄並略過
+    results = await asyncio.gather(
+        *[search_from(departure) for departure in TAIWAN_MAIN_AIRPORTS],
+        return_exceptions=True
+    )
     
     # 整合所有台灣機場出發的航班
     all_flights = []
-    for departure in TAIWAN_AIRPORTS:
-        # 只需要考慮幾個主要機場，提高效率
-        if departure not in ['TPE', 'TSA', 'KHH', 'RMQ', 'TNN']:
+    for departure, flights in zip(TAIWAN_MAIN_AIRPORTS, results):
+        if isinstance(flights, Exception):
+            current_app.logger.error(f"查詢 {departure} -> {arrival_iata} 航班失敗: {str(flights)}")
             continue
-            
-        # 獲取航班
-        flights = await search_service.search_flights(
-            departure, arrival_iata, departure_date, 
-            airlines, None,
-            price_min, price_max, class_type
-        )
-        
-        # 檢查結果是否有效
-        if 'data' in flights and 'flights' in flights['data']:
-            all_flights.extend(flights['data']['flights'])
+        all_flights.extend(flights.get('outbound', []))
     
     # 排序航班（按價格和時間）
-    all_flights.sort(key=lambda x: (x.get('lowest_price', float('inf')), x.get('departure_time', '')))
+    all_flights.sort(key=flight_sort_key)
     
     result = {
         'data': {
@@ -158,130 +281,74 @@ async def flights_from_taiwan(arrival_iata):
         }
     }
     
-    return jsonify(result)
+    # 合併後的航班逐筆串流輸出，不在記憶體中另外組出完整的JSON字串
+    return stream_json(result)
 
 @flight_bp.route('/<string:flight_id>', methods=['GET'])
 async def get_flight_details(flight_id):
     """獲取航班詳細信息"""
-    # 查詢航班
-    from app.database.db import get_db, release_db
+    # 查詢航班，取得資料後即歸還連接，格式化不佔用連接
+    async with acquire_read() as db:
+        # 固定的語句文字可命中 asyncpg 每個連接的預備語句緩存，省去重複解析與規劃
+        flight = await db.fetchrow(FLIGHT_DETAIL_SQL, flight_id)
+    
+    if not flight:
+        return jsonify({'error': '找不到該航班'}), 404
+    
+    # 依 FLIGHT_DETAIL_SQL 的欄位順序一次解包
+    (flight_id, flight_number, departure_time, arrival_time, status, is_domestic,
+     departure_id, departure_name, departure_city, departure_country,
+     arrival_id, arrival_name, arrival_city, arrival_country,
+     airline_id, airline_name, prices) = flight
+    
+    # 格式化結果
+    result = {
+        'flight_id': flight_id,
+        'flight_number': flight_number,
+        'airline': {
+            'id': airline_id,
+            'code': airline_id,
+            'name': airline_name
+        },
+        'departure': {
+            'airport_id': departure_id,
+            'code': departure_id,
+            'name': departure_name,
+            'city': departure_city,
+            'country': departure_country,
+            'time': departure_time.isoformat()
+        },
+        'arrival': {
+            'airport_id': arrival_id,
+            'code': arrival_id,
+            'name': arrival_name,
+            'city': arrival_city,
+            'country': arrival_country,
+            'time': arrival_time.isoformat()
+        },
+        'status': status,
+        'is_domestic': is_domestic,
+        'prices': prices
+    }
     
-    db = await get_db()
+    # 計算飛行時間
     try:
-        # 使用 asyncpg 直接查詢
-        query = """
-        SELECT 
-            f.flight_id, 
-            f.flight_number, 
-            f.scheduled_departure, 
-            f.scheduled_arrival, 
-            f.status,
-            al.is_domestic,
-            a_dep.airport_id as departure_id, 
-            a_dep.name_zh as departure_name,
-            a_dep.city as departure_city,
-            a_dep.country as departure_country,
-            a_arr.airport_id as arrival_id, 
-            a_arr.name_zh as arrival_name,
-            a_arr.city as arrival_city,
-            a_arr.country as arrival_country,
-            al.airline_id, 
-            al.name_zh as airline_name
-        FROM 
-            flights f
-        JOIN 
-            airports a_dep ON f.departure_airport_id = a_dep.airport_id
-        JOIN 
-            airports a_arr ON f.arrival_airport_id = a_arr.airport_id
-        JOIN 
-            airlines al ON f.airline_id = al.airline_id
-        WHERE 
-            f.flight_id = $1
-        """
-        
-        flight = await db.fetchrow(query, flight_id)
-        
-        if not flight:
-            return jsonify({'error': '找不到該航班'}), 404
-        
-        # 格式化結果
-        result = {
-            'flight_id': flight['flight_id'],
-            'flight_number': flight['flight_number'],
-            'airline': {
-                'id': flight['airline_id'],
-                'code': flight['airline_id'],
-                'name': flight['airline_name']
-            },
-            'departure': {
-                'airport_id': flight['departure_id'],
-                'code': flight['departure_id'],
-                'name': flight['departure_name'],
-                'city': flight['departure_city'],
-                'country': flight['departure_country'],
-                'time': flight['scheduled_departure'].isoformat()
-            },
-            'arrival': {
-                'airport_id': flight['arrival_id'],
-                'code': flight['arrival_id'],
-                'name': flight['arrival_name'],
-                'city': flight['arrival_city'],
-                'country': flight['arrival_country'],
-                'time': flight['scheduled_arrival'].isoformat()
-            },
-            'status': flight['status'],
-            'is_domestic': flight['is_domestic']
-        }
-        
-        # 計算飛行時間
-        try:
-            dep_time = flight['scheduled_departure']
-            arr_time = flight['scheduled_arrival']
-            duration_minutes = int((arr_time - dep_time).total_seconds() / 60)
-            result['duration'] = str(duration_minutes) + " 分鐘"
-        except:
-            result['duration'] = None
-        
-        # 獲取票價
-        price_query = """
-        SELECT 
-            class_type, 
-            base_price, 
-            available_seats, 
-            price_updated_at 
-        FROM 
-            ticket_prices 
-        WHERE 
-            flight_id = $1
-        """
-        
-        prices_rows = await db.fetch(price_query, flight_id)
-        prices = []
-        
-        for price in prices_rows:
-            prices.append({
-                'class_type': price['class_type'],
-                'price': float(price['base_price']),
-                'available_seats': price['available_seats'],
-                'updated_at': price['price_updated_at'].isoformat() if price['price_updated_at'] else None
-            })
-        
-        result['prices'] = prices
-        
-        return jsonify(result)
-    finally:
-        await release_db(db)
+        duration_minutes = int((arrival_time - departure_time).total_seconds() / 60)
+        result['duration'] = str(duration_minutes) + " 分鐘"
+    except:
+        result['duration'] = None
+    
+    return jsonify(result)
 
 @flight_bp.route('/airlines', methods=['GET'])
-@cache.cached(timeout=3600)  # 緩存1小時
+@etag_cached(cache, timeout=3600)  # 緩存1小時
 async def get_available_airlines():
     """獲取所有可用的航空公司列表，用於篩選條件"""
-    search_service = SearchService()
     airlines = await search_service.get_available_airlines()
     
     # 標記目標航空公司
     for airline in airlines:
-        airline['is_target'] = airline.get('airline_id') in TARGET_AIRLINES
+        airline['is_target'] = airline.get('airline_id') in TARGET_AIRLINE_SET
         
     return jsonify(airlines)
 
@@ -295,7 +362,6 @@ async def get_taiwan_airports_api():
     """
     try:
         date_str = request.args.get('date')
-        search_service = SearchService()
         airports = await search_service.get_taiwan_airports()
         
         # 調試輸出
@@ -308,7 +374,7 @@ async def get_taiwan_airports_api():
         return jsonify({'error': f'獲取台灣機場失敗: {str(e)}'}), 500
 
 @flight_bp.route('/<string:departure_code>/destinations', methods=['GET'])
-@cache.cached(timeout=3600, query_string=True)  # 緩存1小時，考慮查詢參數
+@etag_cached(cache, timeout=3600, key_prefix=lambda: route_cache_key('destinations'))  # 緩存1小時
 async def get_available_destinations(departure_code):
     """
     獲取從指定出發地可以到達的所有目的地
@@ -320,12 +386,11 @@ async def get_available_destinations(departure_code):
         date: 日期 YYYY-MM-DD格式 (可選)，如提供將只返回該日期有航班的目的地
     """
     date_str = request.args.get('date')
-    search_service = SearchService()
     destinations = await search_service.get_available_destinations(departure_code, date_str)
     return jsonify(destinations)
 
 @flight_bp.route('/airports/<string:departure_code>/departures', methods=['GET'])
-@cache.cached(timeout=3600, query_string=True)  # 緩存1小時，考慮查詢參數
+@etag_cached(cache, timeout=3600, key_prefix=lambda: route_cache_key('departures'))  # 緩存1小時
 async def get_airport_departures(departure_code):
     """
     獲取從指定出發地在特定日期出發的所有航班
@@ -341,71 +406,78 @@ async def get_airport_departures(departure_code):
     if not date_str:
         return jsonify({'error': '必須提供日期參數'}), 400
         
-    search_service = SearchService()
     destinations = await search_service.get_available_destinations(departure_code, date_str)
     return jsonify(destinations)
 
 @flight_bp.route('/popular-routes', methods=['GET'])
-@cache.cached(timeout=3600)  # 緩存1小時
 def get_popular_routes():
     """獲取熱門航線列表"""
-    # 台灣國內熱門航線
-    domestic_routes = [
-        {'departure': 'TPE', 'arrival': 'KHH', 'name': '台北-高雄'},
-        {'departure': 'TSA', 'arrival': 'KHH', 'name': '台北-高雄'},
-        {'departure': 'TSA', 'arrival': 'RMQ', 'name': '台北-台中'},
-        {'departure': 'TSA', 'arrival': 'TNN', 'name': '台北-台南'},
-        {'departure': 'TSA', 'arrival': 'MZG', 'name': '台北-澎湖'},
-        {'departure': 'TSA', 'arrival': 'HUN', 'name': '台北-花蓮'},
-        {'departure': 'TSA', 'arrival': 'KNH', 'name': '台北-金門'}
-    ]
-    
-    # 國際熱門航線
-    international_routes = [
-        {'departure': 'TPE', 'arrival': 'NRT', 'name': '台北-東京成田'},
-        {'departure': 'TPE', 'arrival': 'HND', 'name': '台北-東京羽田'},
-        {'departure': 'TPE', 'arrival': 'KIX', 'name': '台北-大阪'},
-        {'departure': 'TPE', 'arrival': 'ICN', 'name': '台北-首爾'},
-        {'departure': 'TPE', 'arrival': 'HKG', 'name': '台北-香港'},
-        {'departure': 'TPE', 'arrival': 'BKK', 'name': '台北-曼谷'},
-        {'departure': 'TPE', 'arrival': 'SIN', 'name': '台北-新加坡'},
-        {'departure': 'TPE', 'arrival': 'MNL', 'name': '台北-馬尼拉'}
-    ]
-    
-    return jsonify({
-        'domestic': domestic_routes,
-        'international': international_routes
-    })
+    response = current_app.response_class(POPULAR_ROUTES_JSON, mimetype='application/json')
+    response.set_etag(POPULAR_ROUTES_ETAG)
+
+    # 內容於進程生命週期內不變，允許瀏覽器及CDN直接緩存
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
 
 @flight_bp.route('/sync-taiwan-flights', methods=['POST'])
 def sync_taiwan_flights():
-    """同步台灣出發的航班數據"""
+    """
+    同步台灣出發的航班數據
+    
+    同步在背景執行，立即返回 202 與任務ID，可透過 /sync-status/<task_id> 查詢進度
+    """
     # 獲取請求參數
-    data = request.json or {}
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
     date = data.get('date')
     days = data.get('days', 1)
     
     if not date:
         return jsonify({'error': '必須提供日期參數'}), 400
+    if not isinstance(days, int) or isinstance(days, bool) or days < 1:
+        return jsonify({'error': 'days 參數必須為正整數'}), 400
     
-    # 初始化同步服務
-    sync_service = DataSyncService()
+    # 提交背景同步任務
+    task_id = sync_task_runner.submit(_run_taiwan_flights_sync, date, days)
+    current_app.logger.info(f"已提交台灣航班同步任務: {task_id}")
     
-    # 執行同步
-    try:
-        result = sync_service.sync_taiwan_flights(date, days)
-        return jsonify(result)
-    except Exception as e:
-        current_app.logger.error(f"同步台灣航班失敗: {str(e)}")
-        return jsonify({'error': f'同步失敗: {str(e)}'}), 500
+    return jsonify({'success': True, 'task_id': task_id}), 202
+
+@flight_bp.route('/sync-status/<string:task_id>', methods=['GET'])
+def get_sync_status(task_id):
+    """查詢背景同步任務的狀態"""
+    status = sync_task_runner.get_status(task_id)
+    if status is None:
+        return jsonify({'error': '找不到該同步任務'}), 404
+    return jsonify(status)
+
+def _run_taiwan_flights_sync(date, days):
+    """
+    在背景線程執行台灣航班同步
+    
+    asyncpg 連接池綁定於建立它的事件循環，因此背景任務使用自己的連接池，
+    不與請求處理共用全局連接池
+    """
+    async def run():
+        pool = await asyncpg.create_pool(get_db_url(), min_size=1, max_size=5)
+        try:
+            sync_service = DataSyncService(pool=pool)
+            return await sync_service.sync_taiwan_flights(date, days)
+        finally:
+            await pool.close()
+    
+    return asyncio.run(run())
 
 @flight_bp.route('/generate-test-data', methods=['POST'])
 def generate_test_data():
     """生成測試數據"""
     # 獲取請求參數
-    data = request.json
+    data = request.get_json(silent=True)
     
-    if not data:
+    if not isinstance(data, dict) or not data:
         return jsonify({'error': '缺少請求數據'}), 400
         
     departure_iata = data.get('departure')
@@ -420,6 +492,10 @@ def generate_test_data():
             'error': '必須提供出發機場、到達機場和開始日期'
         }), 400
     
+    for value in (num_days, flights_per_day):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            return jsonify({'error': 'num_days 和 flights_per_day 必須為正整數'}), 400
+    
     # 使用數據同步服務生成測試數據
     result = DataSyncService.generate_test_data(
         departure_iata, arrival_iata, start_date, num_days, flights_per_day
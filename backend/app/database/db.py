@@ -6,9 +6,14 @@
 """
 
 import os
+import json
+import asyncio
 import logging
-from typing import AsyncGenerator, Optional
-import urllib.parse
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.schema import CreateIndex
 
 # 從 models/base.py 導入 SQLAlchemy 實例
 # 注意：這裡不直接初始化 SQLAlchemy，而是使用已經在 base.py 中初始化的實例
@@ -16,25 +21,75 @@ from app.models.base import db as sqlalchemy_db
 
 # 用於 FastAPI 異步支持
 import asyncpg
+from asyncpg import Connection
 from asyncpg.pool import Pool
 
 # 配置日誌
 logger = logging.getLogger("database")
 
+def build_db_url():
+    """
+    從環境變量組合數據庫URL
+
+    優先使用 DATABASE_URL，否則以 DB_HOST、DB_PORT、DB_NAME、DB_USER、DB_PASSWORD 組合，
+    由 URL.create 轉義密碼中的 @、: 等特殊字元
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        return database_url
+    
+    db_host = os.getenv("DB_HOST")
+    if not db_host:
+        return "postgresql://postgres@localhost:5432/flight_integration"
+    
+    return URL.create(
+        "postgresql",
+        username=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD") or None,
+        host=db_host,
+        port=int(os.getenv("DB_PORT", "5432")),
+        database=os.getenv("DB_NAME", "flight_integration")
+    ).render_as_string(hide_password=False)
+
 # 數據庫連接設置
-DB_URL = os.getenv("DATABASE_URL", "postgresql://postgres@localhost:5432/flight_integration")
+DB_URL = build_db_url()
+
+# 只讀副本連接，未設置時讀取查詢同樣使用主庫
+DB_READ_URL = os.getenv("DATABASE_READ_URL") or DB_URL
 
 # 解析數據庫 URL
-parsed_url = urllib.parse.urlparse(DB_URL)
-DB_HOST = parsed_url.hostname or "localhost"
+parsed_url = make_url(DB_URL)
+DB_HOST = parsed_url.host or "localhost"
 DB_PORT = parsed_url.port or 5432
-DB_NAME = parsed_url.path[1:] if parsed_url.path else "flight_integration"
+DB_NAME = parsed_url.database or "flight_integration"
 DB_USER = parsed_url.username or "postgres"
 DB_PASSWORD = parsed_url.password or ""
 DB_SSL = "sslmode=require" in DB_URL
 
-# 異步數據庫連接池
+# SQLAlchemy 連接池設置：連接前檢查存活並定期回收，避免使用已被伺服器關閉的連接
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800
+}
+
+# asyncpg 連接池設置：每個連接緩存預備語句，重複查詢省去解析與規劃的往返
+ASYNCPG_POOL_OPTIONS = {
+    "min_size": 5,
+    "max_size": 20,
+    "statement_cache_size": 1024,
+    "max_cacheable_statement_size": 1024 * 15,
+    "max_inactive_connection_lifetime": 300,
+    "command_timeout": 30
+}
+
+# 異步數據庫連接池（主庫及只讀副本）
 _asyncpg_pool: Optional[Pool] = None
+_asyncpg_read_pool: Optional[Pool] = None
+
+# 防止首批並發請求各自建立連接池
+_pool_lock = asyncio.Lock()
 
 def get_db_url():
     """獲取數據庫URL"""
@@ -45,6 +100,7 @@ def init_sqlalchemy(app):
     # 設置數據庫URL
     app.config['SQLALCHEMY_DATABASE_URI'] = get_db_url()
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', SQLALCHEMY_ENGINE_OPTIONS)
     
     # 初始化 SQLAlchemy 並與 app 綁定
     sqlalchemy_db.init_app(app)
@@ -52,49 +108,184 @@ def init_sqlalchemy(app):
     logger.info("SQLAlchemy 數據庫連接已初始化")
     return sqlalchemy_db
 
+# 模型索引依賴的數據庫擴展（三元組索引需要 pg_trgm）
+REQUIRED_EXTENSIONS = ('pg_trgm',)
+
+# 建立失敗（INVALID）的索引，IF NOT EXISTS 不會重建，需先刪除
+INVALID_INDEXES_SQL = """
+    SELECT c.relname
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE NOT i.indisvalid
+"""
+
+def create_extensions(connection):
+    """安裝模型索引依賴的數據庫擴展"""
+    for name in REQUIRED_EXTENSIONS:
+        connection.exec_driver_sql(f"CREATE EXTENSION IF NOT EXISTS {name}")
+
+def index_ddl(dialect):
+    """
+    生成模型中宣告的所有索引的建立語句
+
+    以 CONCURRENTLY 建立不阻塞寫入；IF NOT EXISTS 使重複執行時跳過已存在的索引
+
+    Args:
+        dialect: 數據庫方言
+
+    Returns:
+        list: (數據表名稱, 索引名稱, 建立語句) 列表
+    """
+    # 導入所有模型，使其索引註冊到 metadata
+    import app.models  # noqa: F401
+    
+    statements = []
+    for table in sqlalchemy_db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+            statements.append((table.name, index.name, ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)))
+    return statements
+
+def create_indexes(url=None):
+    """
+    在現有數據庫上建立擴展及模型中宣告的索引
+
+    數據表由同步腳本建立，不經 create_all，索引須以此步驟另行建立；可重複執行。
+    CONCURRENTLY 不能在事務中執行，因此使用自動提交連接
+
+    Args:
+        url: 數據庫URL，預設為 DATABASE_URL
+
+    Returns:
+        int: 執行的索引語句數
+    """
+    engine = create_engine(url or get_db_url(), isolation_level="AUTOCOMMIT")
+    try:
+        with engine.connect() as conn:
+            create_extensions(conn)
+            statements = index_ddl(conn.dialect)
+            invalid = {row[0] for row in conn.exec_driver_sql(INVALID_INDEXES_SQL)}
+            tables = set(inspect(conn).get_table_names())
+            for table_name, name, ddl in statements:
+                if table_name not in tables:
+                    logger.warning(f"數據表 {table_name} 不存在，跳過索引 {name}")
+                    continue
+                if name in invalid:
+                    conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                conn.exec_driver_sql(ddl)
+                logger.info(f"索引已就緒: {name}")
+    finally:
+        engine.dispose()
+    return len(statements)
+
+async def _init_connection(conn: Connection):
+    """
+    設置新建立的物理連接
+
+    JSON 與 JSONB 欄位直接解碼為 Python 對象，編解碼器每個連接只註冊一次
+    """
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+async def _create_pool(url, **options) -> Pool:
+    """以統一設置建立 asyncpg 連接池"""
+    # 直接使用完整連接字串，不嘗試解析
+    return await asyncpg.create_pool(
+        url,
+        init=_init_connection,
+        **ASYNCPG_POOL_OPTIONS,
+        **options
+    )
+
 async def init_asyncpg_pool() -> Pool:
     """初始化 asyncpg 連接池"""
     global _asyncpg_pool
     
-    if _asyncpg_pool is None:
-        try:
-            # 直接使用完整連接字串，不嘗試解析
-            _asyncpg_pool = await asyncpg.create_pool(
-                DB_URL,
-                min_size=5,
-                max_size=20
-            )
-            logger.info("asyncpg 數據庫連接池初始化成功")
-        except Exception as e:
-            logger.error(f"asyncpg 數據庫連接池初始化失敗: {str(e)}")
-            raise
+    if _asyncpg_pool is not None:
+        return _asyncpg_pool
+    
+    async with _pool_lock:
+        # 等待鎖期間可能已由其他協程建立
+        if _asyncpg_pool is None:
+            try:
+                _asyncpg_pool = await _create_pool(DB_URL)
+                logger.info("asyncpg 數據庫連接池初始化成功")
+            except Exception as e:
+                logger.error(f"asyncpg 數據庫連接池初始化失敗: {str(e)}")
+                raise
     
     return _asyncpg_pool
 
-async def get_db():
+async def init_asyncpg_read_pool() -> Pool:
     """
-    獲取 asyncpg 數據庫連接
+    初始化只讀副本的 asyncpg 連接池
     
-    Returns:
+    未設置 DATABASE_READ_URL 時直接返回主庫連接池；
+    副本連接的事務預設為只讀，誤將寫入發往副本時由數據庫拒絕
+    """
+    global _asyncpg_read_pool
+    
+    if DB_READ_URL == DB_URL:
+        return await init_asyncpg_pool()
+    
+    if _asyncpg_read_pool is not None:
+        return _asyncpg_read_pool
+    
+    async with _pool_lock:
+        if _asyncpg_read_pool is None:
+            try:
+                _asyncpg_read_pool = await _create_pool(
+                    DB_READ_URL,
+                    server_settings={'default_transaction_read_only': 'on'}
+                )
+                logger.info("asyncpg 只讀副本連接池初始化成功")
+            except Exception as e:
+                logger.error(f"asyncpg 只讀副本連接池初始化失敗: {str(e)}")
+                raise
+    
+    return _asyncpg_read_pool
+
+@asynccontextmanager
+async def acquire() -> AsyncIterator[Connection]:
+    """
+    從連接池獲取 asyncpg 數據庫連接，離開區塊時自動歸還
+    
+    用法:
+        async with acquire() as conn:
+            rows = await conn.fetch(query)
+    
+    Yields:
         Connection: 異步數據庫連接
     """
     pool = await init_asyncpg_pool()
-    return await pool.acquire()
+    async with pool.acquire() as conn:
+        yield conn
 
-async def release_db(conn):
+@asynccontextmanager
+async def acquire_read() -> AsyncIterator[Connection]:
     """
-    釋放數據庫連接
+    獲取只讀查詢用的 asyncpg 數據庫連接，用法與 acquire 相同
     
-    Args:
-        conn: 要釋放的連接
+    Yields:
+        Connection: 只讀副本（未設置時為主庫）的異步數據庫連接
     """
-    if conn:
-        pool = await init_asyncpg_pool()
-        await pool.release(conn)
+    pool = await init_asyncpg_read_pool()
+    async with pool.acquire() as conn:
+        yield conn
 
 async def close_asyncpg_pool():
     """關閉 asyncpg 連接池"""
-    global _asyncpg_pool
+    global _asyncpg_pool, _asyncpg_read_pool
+    
+    if _asyncpg_read_pool:
+        await _asyncpg_read_pool.close()
+        _asyncpg_read_pool = None
+        logger.info("asyncpg 只讀副本連接池已關閉")
     
     if _asyncpg_pool:
         await _asyncpg_pool.close()
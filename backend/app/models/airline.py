@@ -1,7 +1,8 @@
 """
 航空公司模型
 """
-from .base import db, Base
+from sqlalchemy import or_
+from .base import db, Base, trigram_index
 
 class Airline(Base):
     """航空公司數據模型"""
@@ -14,24 +15,42 @@ class Airline(Base):
     contact_phone = db.Column(db.String)
     is_domestic = db.Column(db.Boolean)
     
-    # 關聯
-    flights = db.relationship('Flight', backref='airline', lazy='dynamic')
+    # 中英文名稱模糊搜索使用的三元組索引
+    __table_args__ = (
+        trigram_index('ix_airlines_name_zh_trgm', 'name_zh'),
+        trigram_index('ix_airlines_name_en_trgm', 'name_en'),
+    )
+    
+    # 關聯（反向關聯 Flight.airline 於航班模型中宣告）
+    flights = db.relationship('Flight', back_populates='airline', lazy='select')
     
     def __repr__(self):
         return f"<Airline {self.airline_id} - {self.name_zh}>"
     
     @classmethod
     def get_by_iata(cls, iata_code):
-        """通過IATA代碼獲取航空公司"""
-        return cls.query.filter_by(airline_id=iata_code).first()
+        """通過IATA代碼獲取航空公司（IATA代碼即主鍵）"""
+        return cls.get_by_id(iata_code)
+    
+    @classmethod
+    def name_filter(cls, pattern):
+        """
+        中英文名稱模糊比對條件
+        
+        Args:
+            pattern: ILIKE 比對模式，可為字串或預先建立查詢時的 bindparam
+        """
+        return or_(cls.name_zh.ilike(pattern), cls.name_en.ilike(pattern))
     
     @classmethod
-    def get_by_name(cls, name, lang='zh'):
-        """通過名稱獲取航空公司"""
+    def get_by_name(cls, name, lang=None):
+        """通過名稱獲取航空公司，未指定語言時同時比對中英文名稱"""
+        pattern = f"%{name}%"
         if lang == 'zh':
-            return cls.query.filter(cls.name_zh.ilike(f"%{name}%")).all()
-        else:
-            return cls.query.filter(cls.name_en.ilike(f"%{name}%")).all()
+            return cls.query.filter(cls.name_zh.ilike(pattern)).all()
+        if lang == 'en':
+            return cls.query.filter(cls.name_en.ilike(pattern)).all()
+        return cls.query.filter(cls.name_filter(pattern)).all()
     
     @classmethod
     def get_domestic(cls):
@@ -27,8 +27,8 @@ class Airport(Base):
     
     @classmethod
     def get_by_iata(cls, iata_code):
-        """通過IATA代碼獲取機場"""
-        return cls.query.filter_by(airport_id=iata_code).first()
+        """通過IATA代碼獲取機場（IATA代碼即主鍵）"""
+        return cls.get_by_id(iata_code)
     
     @classmethod
     def get_by_city(cls, city):
@@ -2,33 +2,134 @@
 基礎模型定義
 包含所有模型共用的基礎類和方法
 """
-from datetime import datetime
-from uuid import uuid4
+import os
+import time
+from datetime import datetime, time as dt_time, timedelta
+from uuid import UUID as PyUUID, uuid4
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 db = SQLAlchemy()
 
+def trigram_index(name, column):
+    """
+    建立 pg_trgm GIN 索引，使 ILIKE '%關鍵字%' 模糊搜索不必全表掃描
+
+    pg_trgm 擴展與索引均由 database.db.create_indexes 建立
+
+    Args:
+        name: 索引名稱
+        column: 欄位名稱
+    """
+    return db.Index(name, column, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+def uuid7():
+    """
+    生成按時間排序的 UUID (版本7)
+
+    前48位為毫秒時間戳，其餘為隨機位；新記錄的主鍵依時間遞增，
+    插入集中在索引末端的頁面，而非隨機分散到整棵 B-tree
+
+    Returns:
+        uuid.UUID: 版本7 UUID
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    # 設置版本號 (7) 及 RFC 9562 變體位
+    value = value & ~(0xF << 76) | (0x7 << 76)
+    value = value & ~(0x3 << 62) | (0x2 << 62)
+    return PyUUID(int=value)
+
+# 日期範圍查詢使用的常量
+MIDNIGHT = dt_time(0, 0)
+ONE_DAY = timedelta(days=1)
+
+def day_range(date):
+    """
+    返回某日的半開時間區間 [當日零時, 翌日零時)
+
+    以 >= 起點、< 終點比較，可直接在時間欄位的索引上做範圍掃描；
+    不附帶時區，與同步寫入的航班時間一樣按數據庫會話時區解讀
+
+    Args:
+        date: 日期 (datetime.date)
+
+    Returns:
+        (start, end) 元組
+    """
+    start = datetime.combine(date, MIDNIGHT)
+    return start, start + ONE_DAY
+
+def fetch_rows(stmt, params=None):
+    """執行欄位查詢並以字典列表返回結果，不建立ORM實例"""
+    return [dict(row) for row in db.session.execute(stmt, params).mappings()]
+
+@event.listens_for(Session, 'after_flush')
+def _mark_pending_commit(session, flush_context):
+    """記錄會話中有已送出但未提交的寫入"""
+    session.info['pending_commit'] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_pending_commit_on_dml(orm_execute_state):
+    """直接執行的 INSERT/UPDATE/DELETE 語句不經 flush，同樣需要提交"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['pending_commit'] = True
+
+def commit_session(response):
+    """
+    請求結束時統一提交本次請求的寫入
+
+    模型方法只 flush，一個請求內的多筆寫入合併為一次提交；
+    響應為錯誤狀態時回滾。只讀請求不發送額外的 COMMIT
+
+    Args:
+        response: 響應對象
+
+    Returns:
+        原響應對象
+    """
+    session = db.session
+    if session.info.pop('pending_commit', False):
+        if response.status_code < 400:
+            session.commit()
+        else:
+            session.rollback()
+    return response
+
 class Base(db.Model):
     """所有模型的基礎類"""
     __abstract__ = True
     
     def save(self):
-        """保存當前實例到數據庫"""
+        """
+        保存當前實例到數據庫
+
+        只 flush 不提交，請求內由 commit_session 於結束時提交；
+        請求以外（如命令列腳本）需自行調用 db.session.commit()
+        """
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
         return self
     
     def delete(self):
-        """從數據庫中刪除當前實例"""
+        """
+        從數據庫中刪除當前實例
+
+        只 flush 不提交，提交時機與 save 相同
+        """
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
         return self
         
     @classmethod
     def get_by_id(cls, id):
-        """通過ID獲取實例"""
-        return cls.query.get(id)
+        """
+        通過ID獲取實例
+
+        先查找會話的身份映射，已加載的實例不再發送查詢
+        """
+        return db.session.get(cls, id)
     
     @classmethod
     def get_all(cls):
@@ -2,14 +2,13 @@
 常用詞彙模型
 """
 from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
-from .base import db, Base
+from .base import db, Base, uuid7, trigram_index
 
 class CommonPhrase(Base):
     """常用詞彙數據模型"""
     __tablename__ = 'common_phrases'
     
-    phrase_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    phrase_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     category = db.Column(db.String, nullable=False)
     language = db.Column(db.String, nullable=False)
     phrase = db.Column(db.Text, nullable=False)
@@ -17,6 +16,14 @@ class CommonPhrase(Base):
     usage_example = db.Column(db.Text)
     is_common = db.Column(db.Boolean, default=False)
     
+    # 詞彙及翻譯模糊搜索使用的三元組索引；
+    # 常用詞彙只佔少數，以部分索引按語言查詢
+    __table_args__ = (
+        trigram_index('ix_common_phrases_phrase_trgm', 'phrase'),
+        trigram_index('ix_common_phrases_translation_trgm', 'translation'),
+        db.Index('ix_common_phrases_common_language', 'language', postgresql_where=is_common),
+    )
+    
     def __repr__(self):
         return f"<CommonPhrase {self.category} - {self.phrase[:20]}>"
     
@@ -2,15 +2,17 @@
 航班模型
 """
 from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
-from datetime import datetime, timedelta
-from .base import db, Base
+from datetime import datetime
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from .base import db, Base, day_range, uuid7
 
 class Flight(Base):
     """航班數據模型"""
     __tablename__ = 'flights'
     
-    flight_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    flight_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     flight_number = db.Column(db.String, nullable=False)
     airline_id = db.Column(db.String, db.ForeignKey('airlines.airline_id'), nullable=False)
     departure_airport_id = db.Column(db.String, db.ForeignKey('airports.airport_id'), nullable=False)
@@ -28,9 +30,17 @@ class Flight(Base):
     created_at = db.Column(db.DateTime, default=datetime.now, nullable=True)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
     
-    # 關聯
-    ticket_prices = db.relationship('TicketPrice', backref='flight', lazy='dynamic', cascade='all, delete-orphan')
-    price_history = db.relationship('PriceHistory', backref='flight', lazy='dynamic', cascade='all, delete-orphan')
+    # 關聯：每個航班只有少數艙位價格，隨航班批量加載；價格歷史持續增長，僅在存取時加載
+    airline = db.relationship('Airline', back_populates='flights')
+    ticket_prices = db.relationship('TicketPrice', backref='flight', lazy='selectin', cascade='all, delete-orphan')
+    price_history = db.relationship('PriceHistory', backref='flight', lazy='select', cascade='all, delete-orphan')
+    
+    # 航線+出發時間的複合索引，供航班搜索的範圍查詢使用；
+    # 包含 airline_id 以便在索引內完成航空公司過濾
+    __table_args__ = (
+        db.Index('ix_flights_search', 'departure_airport_id', 'arrival_airport_id', 'scheduled_departure',
+                 postgresql_include=['airline_id']),
+    )
     
     # 狀態常量
     STATUS_ON_TIME = "準時"
@@ -83,6 +93,49 @@ class Flight(Base):
         else:
             self.status = self.STATUS_ON_TIME
     
+    @classmethod
+    def status_expression(cls):
+        """
+        以SQL表達式計算航班狀態，判斷邏輯與 update_status 相同
+
+        以數據庫當前時間比較，狀態隨查詢一併返回，無需逐筆在 Python 中計算
+        """
+        return case(
+            (cls.is_delayed.is_(True), cls.STATUS_DELAYED),
+            (func.now() > cls.scheduled_arrival, cls.STATUS_ARRIVED),
+            (func.now() > cls.scheduled_departure, cls.STATUS_DEPARTED),
+            else_=cls.STATUS_ON_TIME
+        )
+    
+    @classmethod
+    def _fetch_with_status(cls, query):
+        """
+        執行查詢並套用SQL計算的航班狀態
+
+        狀態只寫入實例而不標記為已修改，之後的 flush 不會逐筆產生 UPDATE
+        """
+        flights = []
+        for flight, status in query.add_columns(cls.status_expression().label('computed_status')).all():
+            set_committed_value(flight, 'status', status)
+            flights.append(flight)
+        return flights
+    
+    @classmethod
+    def query_with_relations(cls):
+        """
+        預先批量加載航空公司、起降機場及票價的查詢，避免逐筆延遲加載 (N+1)
+        
+        持續增長的價格歷史及預測禁止在搜索結果上延遲加載，誤用時直接拋出異常而非逐筆查詢
+        """
+        return cls.query.options(
+            selectinload(cls.airline),
+            selectinload(cls.departure_airport),
+            selectinload(cls.arrival_airport),
+            selectinload(cls.ticket_prices),
+            raiseload(cls.price_history),
+            raiseload(cls.predictions)
+        )
+    
     @classmethod
     def search_flights(cls, departure_airport_id, arrival_airport_id, 
                       departure_date, return_date=None, airline_id=None):
@@ -101,57 +154,56 @@ class Flight(Base):
             return_flights: 回程航班 (如果指定了return_date)
         """
         # 設置日期範圍
-        departure_start = datetime.combine(departure_date, datetime.min.time())
-        departure_end = datetime.combine(departure_date, datetime.max.time())
+        departure_start, departure_end = day_range(departure_date)
         
-        # 基本查詢
-        query = cls.query.filter(
+        # 去程條件
+        outbound = and_(
             cls.departure_airport_id == departure_airport_id,
             cls.arrival_airport_id == arrival_airport_id,
             cls.scheduled_departure >= departure_start,
-            cls.scheduled_departure <= departure_end
+            cls.scheduled_departure < departure_end
         )
         
-        # 如果指定了航空公司，添加過濾條件
+        if not return_date:
+            query = cls.query_with_relations().filter(outbound)
+            
+            # 如果指定了航空公司，添加過濾條件
+            if airline_id:
+                query = query.filter(cls.airline_id == airline_id)
+            
+            return cls._fetch_with_status(query.order_by(cls.scheduled_departure))
+        
+        # 回程條件
+        return_start, return_end = day_range(return_date)
+        inbound = and_(
+            cls.departure_airport_id == arrival_airport_id,  # 注意這裡是相反的
+            cls.arrival_airport_id == departure_airport_id,
+            cls.scheduled_departure >= return_start,
+            cls.scheduled_departure < return_end
+        )
+        
+        # 去程與回程在同一查詢中取得，以SQL標記所屬航段後再分開
+        query = cls.query_with_relations().filter(or_(outbound, inbound))
         if airline_id:
             query = query.filter(cls.airline_id == airline_id)
         
-        outbound_flights = query.order_by(cls.scheduled_departure).all()
+        rows = query.add_columns(
+            cls.status_expression().label('computed_status'),
+            case((outbound, True), else_=False).label('is_outbound')
+        ).order_by(cls.scheduled_departure).all()
         
-        # 更新所有航班的狀態
-        for flight in outbound_flights:
-            flight.update_status()
+        outbound_flights, return_flights = [], []
+        for flight, status, is_outbound in rows:
+            set_committed_value(flight, 'status', status)
+            (outbound_flights if is_outbound else return_flights).append(flight)
         
-        # 如果指定了返回日期，查詢返回航班
-        if return_date:
-            return_start = datetime.combine(return_date, datetime.min.time())
-            return_end = datetime.combine(return_date, datetime.max.time())
-            
-            return_query = cls.query.filter(
-                cls.departure_airport_id == arrival_airport_id,  # 注意這裡是相反的
-                cls.arrival_airport_id == departure_airport_id,
-                cls.scheduled_departure >= return_start,
-                cls.scheduled_departure <= return_end
-            )
-            
-            if airline_id:
-                return_query = return_query.filter(cls.airline_id == airline_id)
-                
-            return_flights = return_query.order_by(cls.scheduled_departure).all()
-            
-            # 更新所有返程航班的狀態
-            for flight in return_flights:
-                flight.update_status()
-                
-            return outbound_flights, return_flights
-        
-        return outbound_flights 
+        return outbound_flights, return_flights
 
     @classmethod
     def search(cls, departure_airport_id=None, arrival_airport_id=None, 
                 departure_date=None, airline_id=None, is_test_data=False):
         """搜尋航班"""
-        query = cls.query
+        query = cls.query_with_relations()
         
         if hasattr(cls, 'is_test_data'):
             query = query.filter_by(is_test_data=is_test_data)
@@ -167,16 +219,14 @@ class Flight(Base):
             if isinstance(departure_date, str):
                 departure_date = datetime.strptime(departure_date, '%Y-%m-%d').date()
             
-            # 查詢指定日期的航班
-            query = query.filter(db.func.date(cls.scheduled_departure) == departure_date)
+            # 查詢指定日期的航班：以半開區間比較，可使用 scheduled_departure 上的索引
+            day_start, day_end = day_range(departure_date)
+            query = query.filter(
+                cls.scheduled_departure >= day_start,
+                cls.scheduled_departure < day_end
+            )
         
         if airline_id:
             query = query.filter_by(airline_id=airline_id)
         
-        flights = query.all()
-        
-        # 更新所有航班的狀態
-        for flight in flights:
-            flight.update_status()
-            
-        return flights 
\ No newline at end of file
+        return cls._fetch_with_status(query) 
\ No newline at end of file
@@ -2,15 +2,35 @@
 航班預測模型
 """
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from uuid import uuid4
+from sqlalchemy.orm import validates
 from datetime import datetime
-from .base import db, Base
+from .base import db, Base, uuid7
+
+# 預測因素每項保留的鍵
+FACTOR_KEYS = {'weight', 'description'}
+
+def normalize_prediction_factors(factors):
+    """
+    將預測因素整理為固定格式
+
+    每個因素只保留 weight 及 description 兩個鍵並補上預設值
+    """
+    if not factors:
+        return factors
+    
+    return {
+        factor: {
+            'weight': details.get('weight', 0),
+            'description': details.get('description', '')
+        }
+        for factor, details in factors.items()
+    }
 
 class FlightPrediction(Base):
     """航班預測數據模型"""
     __tablename__ = 'flight_predictions'
     
-    prediction_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    prediction_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     flight_id = db.Column(UUID(as_uuid=True), db.ForeignKey('flights.flight_id'), nullable=False)
     predicted_status = db.Column(db.String, nullable=False)
     delay_probability = db.Column(db.Numeric)
@@ -18,6 +38,12 @@ class FlightPrediction(Base):
     confidence_level = db.Column(db.Numeric)
     prediction_factors = db.Column(JSONB)
     
+    # 高風險航班及按狀態篩選的排序查詢可沿索引倒序讀取前幾筆，無需排序整張表
+    __table_args__ = (
+        db.Index('ix_flight_predictions_delay_probability', 'delay_probability'),
+        db.Index('ix_flight_predictions_status_confidence', 'predicted_status', 'confidence_level'),
+    )
+    
     # 關聯
     flight = db.relationship('Flight', backref='predictions')
     
@@ -56,17 +82,24 @@ class FlightPrediction(Base):
         """檢查是否為高風險航班"""
         return self.delay_probability and self.delay_probability >= 0.7
     
+    @validates('prediction_factors')
+    def validate_prediction_factors(self, key, factors):
+        """
+        寫入時將預測因素整理為固定格式，讀取時即可直接返回存儲的內容
+        """
+        return normalize_prediction_factors(factors)
+    
     @property
     def formatted_factors(self):
-        """獲取格式化的預測因素"""
-        if not self.prediction_factors:
-            return {}
+        """
+        獲取格式化的預測因素
         
-        # 假設prediction_factors是一個包含預測因素的JSON
-        return {
-            factor: {
-                'weight': details.get('weight', 0),
-                'description': details.get('description', '')
-            }
-            for factor, details in self.prediction_factors.items()
-        } 
\ No newline at end of file
+        經賦值寫入的因素已整理；此前存入的記錄或就地修改的字典不經 @validates，
+        格式不符時在讀取時整理。返回副本，修改結果不影響模型屬性
+        """
+        factors = self.prediction_factors
+        if not factors:
+            return {}
+        if all(isinstance(details, dict) and details.keys() == FACTOR_KEYS for details in factors.values()):
+            return {factor: dict(details) for factor, details in factors.items()}
+        return normalize_prediction_factors(factors)
@@ -2,23 +2,82 @@
 價格歷史模型
 """
 from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
 from datetime import datetime, timedelta
-from .base import db, Base
+from .base import db, Base, uuid7
+
+# COPY 寫入價格歷史的欄位順序
+PRICE_HISTORY_COPY_COLUMNS = ('history_id', 'flight_id', 'class_type', 'price', 'recorded_at')
+
+# 尚未起飛航班的現行票價，供每日價格快照使用；
+# 記錄時間取自數據庫（LOCALTIMESTAMP 即 now() 按會話時區寫入 recorded_at 的值），
+# 與 update_price 等以 now() 寫入的歷史記錄使用同一時鐘
+ACTIVE_PRICES_SQL = """
+    SELECT tp.flight_id, tp.class_type, tp.base_price, LOCALTIMESTAMP AS recorded_at
+    FROM ticket_prices tp
+    JOIN flights f ON f.flight_id = tp.flight_id
+    WHERE f.scheduled_departure >= now()
+"""
 
 class PriceHistory(Base):
     """價格歷史數據模型"""
     __tablename__ = 'price_history'
     
-    history_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    history_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     flight_id = db.Column(UUID(as_uuid=True), db.ForeignKey('flights.flight_id'), nullable=False)
     class_type = db.Column(db.String, nullable=False)
     price = db.Column(db.Numeric, nullable=False)
     recorded_at = db.Column(db.DateTime)
     
+    # 航班+艙位+記錄時間的複合索引，供價格趨勢的範圍查詢使用
+    __table_args__ = (
+        db.Index('ix_price_history_flight_class_time', 'flight_id', 'class_type', 'recorded_at'),
+    )
+    
     def __repr__(self):
         return f"<PriceHistory {self.flight_id} {self.class_type} ${self.price} @ {self.recorded_at}>"
     
+    @classmethod
+    async def copy_records(cls, conn, records):
+        """
+        以 COPY 批量寫入價格歷史
+        
+        大批記錄經 COPY 協議一次傳送，不需逐行解析及執行 INSERT
+        
+        Args:
+            conn: asyncpg 數據庫連接
+            records: (history_id, flight_id, class_type, price, recorded_at) 元組序列
+        
+        Returns:
+            str: COPY 命令的狀態
+        """
+        return await conn.copy_records_to_table(
+            cls.__tablename__,
+            records=records,
+            columns=PRICE_HISTORY_COPY_COLUMNS
+        )
+    
+    @classmethod
+    async def snapshot_prices(cls):
+        """
+        將所有尚未起飛航班的現行票價記錄為價格歷史
+        
+        Returns:
+            int: 寫入的記錄數
+        """
+        from ..database.db import acquire
+        
+        async with acquire() as conn:
+            prices = await conn.fetch(ACTIVE_PRICES_SQL)
+            if not prices:
+                return 0
+            
+            await cls.copy_records(conn, [
+                (uuid7(), flight_id, class_type, base_price, recorded_at)
+                for flight_id, class_type, base_price, recorded_at in prices
+            ])
+        
+        return len(prices)
+    
     @classmethod
     def get_price_trend(cls, flight_id, class_type, days=30, is_test_data=False):
         """
@@ -58,13 +117,15 @@ class PriceHistory(Base):
             按日期分組的平均價格字典
         """
         from .flight import Flight
-        from sqlalchemy import func
+        from sqlalchemy import func, cast, Float
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
+        day = func.date_trunc('day', cls.recorded_at)
         
+        # 日期格式化及平均價格轉換均在數據庫中完成，結果可直接組成字典
         results = db.session.query(
-            func.date_trunc('day', cls.recorded_at).label('date'),
-            func.avg(cls.price).label('avg_price')
+            func.to_char(day, 'YYYY-MM-DD').label('date'),
+            cast(func.avg(cls.price), Float).label('avg_price')
         ).join(
             Flight, Flight.flight_id == cls.flight_id
         ).filter(
@@ -73,14 +134,9 @@ class PriceHistory(Base):
             cls.class_type == class_type,
             cls.recorded_at >= cutoff_date
         ).group_by(
-            func.date_trunc('day', cls.recorded_at)
+            day
         ).order_by(
-            'date'
+            day
         ).all()
         
-        # 將結果轉換為字典
-        trend = {}
-        for date, avg_price in results:
-            trend[date.strftime('%Y-%m-%d')] = float(avg_price)
-            
-        return trend 
\ No newline at end of file
+        return dict(results)
@@ -1,16 +1,34 @@
 """
 機票價格模型
 """
+from sqlalchemy import bindparam, func, insert, select, update
 from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
-from datetime import datetime
-from .base import db, Base
+from sqlalchemy.orm.attributes import set_committed_value
+from .base import db, Base, day_range, uuid7
+from .price_history import PriceHistory
+
+# 批量記錄價格歷史：舊價格直接從 ticket_prices 讀取
+BULK_PRICE_HISTORY_SQL = """
+    INSERT INTO price_history (history_id, flight_id, class_type, price, recorded_at)
+    SELECT $1, flight_id, class_type, base_price, now()
+    FROM ticket_prices
+    WHERE price_id = $2
+"""
+
+# 批量更新價格，未提供座位數時保留原值
+BULK_PRICE_UPDATE_SQL = """
+    UPDATE ticket_prices SET
+        base_price = $2,
+        available_seats = COALESCE($3, available_seats),
+        price_updated_at = now()
+    WHERE price_id = $1
+"""
 
 class TicketPrice(Base):
     """機票價格數據模型"""
     __tablename__ = 'ticket_prices'
     
-    price_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    price_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     flight_id = db.Column(UUID(as_uuid=True), db.ForeignKey('flights.flight_id'), nullable=False)
     class_type = db.Column(db.String, nullable=False)
     base_price = db.Column(db.Numeric, nullable=False)
@@ -28,36 +46,64 @@ class TicketPrice(Base):
         """
         更新價格並記錄歷史
         
+        歷史記錄以 CTE 與價格更新合併為一條語句，一次往返完成，
+        並以 RETURNING 取回更新後的值同步實例；與 Base.save 相同只送出語句不提交
+        
         Args:
             new_price: 新價格
             available_seats: 可選，新的可用座位數
         """
-        from .price_history import PriceHistory
-        
-        # 記錄歷史價格
-        history = PriceHistory(
-            flight_id=self.flight_id,
-            class_type=self.class_type,
-            price=self.base_price
-        )
-        db.session.add(history)
+        row = db.session.execute(UPDATE_PRICE_STATEMENT, {
+            'target_price_id': self.price_id,
+            'history_id': uuid7(),
+            'new_price': new_price,
+            'new_available_seats': available_seats
+        }).one()
         
-        # 更新價格和座位數
-        self.base_price = new_price
-        if available_seats is not None:
-            self.available_seats = available_seats
-        self.price_updated_at = datetime.utcnow()
+        # 同步實例屬性，不再產生額外的 UPDATE
+        for key, value in row._mapping.items():
+            set_committed_value(self, key, value)
         
-        db.session.commit()
         return self
     
+    @classmethod
+    async def update_prices_bulk(cls, rows):
+        """
+        批量更新價格並記錄歷史
+        
+        在同一事務內以 executemany 送出，asyncpg 會將各行的 Bind/Execute 管線化，
+        整批只需一次同步往返
+        
+        Args:
+            rows: (price_id, new_price, available_seats) 元組列表，available_seats 可為 None
+        
+        Returns:
+            int: 更新的價格筆數
+        """
+        from ..database.db import acquire
+        
+        rows = list(rows)
+        if not rows:
+            return 0
+        
+        async with acquire() as conn:
+            async with conn.transaction():
+                # 先記錄舊價格，再更新
+                await conn.executemany(
+                    BULK_PRICE_HISTORY_SQL,
+                    [(uuid7(), price_id) for price_id, _, _ in rows]
+                )
+                await conn.executemany(BULK_PRICE_UPDATE_SQL, rows)
+        
+        return len(rows)
+    
     @classmethod
     def get_by_flight_class(cls, flight_id, class_type):
         """獲取特定航班和艙位的價格"""
-        return cls.query.filter_by(
-            flight_id=flight_id,
-            class_type=class_type
-        ).first()
+        return db.session.scalars(GET_BY_FLIGHT_CLASS_STATEMENT, {
+            'flight_id': flight_id,
+            'class_type': class_type
+        }).first()
     
     @classmethod
     def get_lowest_price(cls, departure_airport_id, arrival_airport_id, date):
@@ -65,8 +111,7 @@ class TicketPrice(Base):
         from .flight import Flight
         
         # 設置日期範圍
-        date_start = datetime.combine(date, datetime.min.time())
-        date_end = datetime.combine(date, datetime.max.time())
+        date_start, date_end = day_range(date)
         
         return db.session.query(
             Flight, cls.class_type, db.func.min(cls.base_price).label('min_price')
@@ -76,7 +121,7 @@ class TicketPrice(Base):
             Flight.departure_airport_id == departure_airport_id,
             Flight.arrival_airport_id == arrival_airport_id,
             Flight.scheduled_departure >= date_start,
-            Flight.scheduled_departure <= date_end
+            Flight.scheduled_departure < date_end
         ).group_by(
             Flight.flight_id, cls.class_type
         ).order_by(
@@ -91,4 +136,32 @@ class TicketPrice(Base):
         if class_type:
             query = query.filter_by(class_type=class_type)
             
-        return query.order_by(cls.price_updated_at.desc()).first() 
\ No newline at end of file
+        return query.order_by(cls.price_updated_at.desc()).first() 
+
+# 更新價格的語句：CTE 先以更新前的價格寫入歷史，未提供座位數時保留原值
+_UPDATE_PRICE_HISTORY = insert(PriceHistory).from_select(
+    ['history_id', 'flight_id', 'class_type', 'price', 'recorded_at'],
+    select(
+        bindparam('history_id', type_=UUID(as_uuid=True)),
+        TicketPrice.flight_id,
+        TicketPrice.class_type,
+        TicketPrice.base_price,
+        func.now()
+    ).where(TicketPrice.price_id == bindparam('target_price_id'))
+).cte('history')
+
+UPDATE_PRICE_STATEMENT = update(TicketPrice).where(
+    TicketPrice.price_id == bindparam('target_price_id')
+).values(
+    base_price=bindparam('new_price'),
+    available_seats=func.coalesce(bindparam('new_available_seats', type_=db.Integer), TicketPrice.available_seats),
+    price_updated_at=func.now()
+).add_cte(_UPDATE_PRICE_HISTORY).returning(
+    TicketPrice.base_price, TicketPrice.available_seats, TicketPrice.price_updated_at
+).execution_options(synchronize_session=False)
+
+# 依唯一約束 (flight_id, class_type) 查找價格，語句只建立一次供重複使用
+GET_BY_FLIGHT_CLASS_STATEMENT = select(TicketPrice).where(
+    TicketPrice.flight_id == bindparam('flight_id'),
+    TicketPrice.class_type == bindparam('class_type')
+)
@@ -1,17 +1,21 @@
 """
 用戶模型
 """
+import asyncio
+from sqlalchemy import func, update
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from uuid import uuid4
-from datetime import datetime
+from sqlalchemy.orm.attributes import set_committed_value
 from werkzeug.security import generate_password_hash, check_password_hash
-from .base import db, Base
+from .base import db, Base, uuid7
+
+# 密碼雜湊算法：scrypt 由 OpenSSL 原生實現，舊的 pbkdf2 雜湊於下次驗證成功時升級
+PASSWORD_HASH_METHOD = 'scrypt'
 
 class User(Base):
     """用戶數據模型"""
     __tablename__ = 'users'
     
-    user_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    user_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     line_user_id = db.Column(db.String, unique=True)
     email = db.Column(db.String, unique=True)
     password_hash = db.Column(db.String)
@@ -23,9 +27,16 @@ class User(Base):
     preferences = db.Column(JSONB, default={})
     last_login_time = db.Column(db.DateTime(timezone=True))
     
-    # 關聯
-    search_history = db.relationship('UserSearchHistory', backref='user', lazy='dynamic', cascade='all, delete-orphan')
-    queries = db.relationship('UserQuery', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    # 偏好設定以 @> 包含查詢，jsonb_path_ops 的 GIN 索引只支持 @> 但體積較小
+    __table_args__ = (
+        db.Index('ix_users_preferences_gin', 'preferences',
+                 postgresql_using='gin', postgresql_ops={'preferences': 'jsonb_path_ops'}),
+    )
+    
+    # 關聯：作為一般集合加載，可配合 selectinload 批量預先加載；
+    # 只需最近幾筆時使用 recent_history / recent_queries，不加載整個集合
+    search_history = db.relationship('UserSearchHistory', backref='user', lazy='select', cascade='all, delete-orphan')
+    queries = db.relationship('UserQuery', backref='user', lazy='select', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f"<User {self.email or self.line_user_id}>"
@@ -38,18 +49,81 @@ class User(Base):
     @password.setter
     def password(self, password):
         """Sets password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
         
     def verify_password(self, password):
-        """Verify password against stored hash"""
-        if self.password_hash:
-            return check_password_hash(self.password_hash, password)
-        return False
+        """Verify password against stored hash, upgrading legacy hashes on success"""
+        if not self.password_hash:
+            return False
+        if not check_password_hash(self.password_hash, password):
+            return False
+        if self.has_legacy_hash:
+            self.password = password
+            self.save()
+        return True
+    
+    async def verify_password_async(self, password):
+        """
+        在異步路由中驗證密碼
+        
+        只有刻意耗時的雜湊計算交由線程池執行，不阻塞事件循環；
+        舊雜湊的升級及寫入仍在調用方線程以請求的數據庫會話完成
+        """
+        if not self.password_hash:
+            return False
+        if not await asyncio.to_thread(check_password_hash, self.password_hash, password):
+            return False
+        if self.has_legacy_hash:
+            self.password_hash = await asyncio.to_thread(
+                generate_password_hash, password, method=PASSWORD_HASH_METHOD
+            )
+            self.save()
+        return True
+    
+    @property
+    def has_legacy_hash(self):
+        """密碼雜湊是否使用舊算法，需在下次驗證成功時升級"""
+        return not self.password_hash.startswith(PASSWORD_HASH_METHOD + ':')
+    
+    def recent_history(self, limit=10):
+        """獲取最近的搜索歷史"""
+        from .user_search_history import UserSearchHistory
+        return UserSearchHistory.get_by_user(self.user_id, limit)
+    
+    def recent_queries(self, limit=10):
+        """獲取最近的查詢記錄"""
+        from .user_query import UserQuery
+        return UserQuery.get_by_user(self.user_id, limit)
     
     def update_login_time(self):
-        """更新最後登入時間"""
-        self.last_login_time = datetime.utcnow()
-        db.session.commit()
+        """
+        更新最後登入時間
+        
+        以單條 UPDATE 寫入數據庫時間並取回結果同步實例，不經 ORM flush；
+        與 Base.save 相同只送出語句不提交，由請求結束時統一提交
+        """
+        last_login_time = db.session.execute(
+            update(User).where(
+                User.user_id == self.user_id
+            ).values(
+                last_login_time=func.now()
+            ).returning(User.last_login_time).execution_options(synchronize_session=False)
+        ).scalar_one()
+        set_committed_value(self, 'last_login_time', last_login_time)
+        return self
+    
+    @classmethod
+    def find_by_preference(cls, fragment):
+        """
+        查找偏好設定包含指定內容的用戶
+        
+        以 preferences @> fragment 比較才能使用 GIN 索引；
+        preferences->>'key' = 'value' 形式的比較無法使用該索引，應改寫為包含查詢
+        
+        Args:
+            fragment: 偏好設定片段，例如 {'language': 'en'}
+        """
+        return cls.query.filter(cls.preferences.contains(fragment)).all()
     
     @classmethod
     def get_by_email(cls, email):
@@ -2,15 +2,18 @@
 用戶查詢模型
 """
 from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
 from datetime import datetime
-from .base import db, Base
+from .base import db, Base, uuid7
+from ..utils.query_cache import QueryCache
+
+# 熱門統計的進程內緩存，統計範圍以天計，一小時內的結果可直接重用
+popular_cache = QueryCache(timeout=3600)
 
 class UserQuery(Base):
     """用戶查詢數據模型"""
     __tablename__ = 'user_queries'
     
-    query_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    query_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'))
     platform = db.Column(db.String, nullable=False)  # 'web', 'line', 'mobile'
     query_type = db.Column(db.String, nullable=False)  # 'flight', 'airport', 'airline', 'weather'
@@ -19,6 +22,15 @@ class UserQuery(Base):
     response_content = db.Column(db.Text)
     was_helpful = db.Column(db.Boolean)
     
+    # 按用戶、平台或類型篩選後取最新記錄的複合索引，沿索引倒序讀取至 LIMIT 即停止
+    __table_args__ = (
+        db.Index('ix_user_queries_user_time', 'user_id', 'query_time'),
+        db.Index('ix_user_queries_platform_time', 'platform', 'query_time'),
+        db.Index('ix_user_queries_type_time', 'query_type', 'query_time'),
+        # 熱門查詢統計的時間範圍；query_content 長度不定，不放入索引以免超出 B-tree 單行上限
+        db.Index('ix_user_queries_time', 'query_time'),
+    )
+    
     def __repr__(self):
         return f"<UserQuery {self.query_type} - {self.query_content[:20]}>"
     
@@ -28,6 +40,7 @@ class UserQuery(Base):
         return cls.query.filter_by(user_id=user_id).order_by(db.desc(cls.query_time)).limit(limit).all()
     
     @classmethod
+    @popular_cache.memoize
     def get_popular_queries(cls, days=30, limit=10):
         """獲取熱門查詢"""
         from sqlalchemy import func
@@ -57,7 +70,6 @@ class UserQuery(Base):
         return cls.query.filter_by(query_type=query_type).order_by(db.desc(cls.query_time)).limit(limit).all()
     
     def mark_helpful(self, helpful=True):
-        """標記查詢是否有幫助"""
+        """標記查詢是否有幫助（只 flush 不提交，與 Base.save 相同）"""
         self.was_helpful = helpful
-        db.session.commit()
-        return self 
\ No newline at end of file
+        return self.save() 
\ No newline at end of file
@@ -2,15 +2,18 @@
 用戶搜索歷史模型
 """
 from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
 from datetime import datetime
-from .base import db, Base
+from .base import db, Base, uuid7
+from ..utils.query_cache import QueryCache
+
+# 熱門統計的進程內緩存，統計範圍以天計，一小時內的結果可直接重用
+popular_cache = QueryCache(timeout=3600)
 
 class UserSearchHistory(Base):
     """用戶搜索歷史數據模型"""
     __tablename__ = 'user_search_history'
     
-    search_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    search_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id'))
     departure_airport_id = db.Column(UUID(as_uuid=True), db.ForeignKey('airports.airport_id'), nullable=False)
     arrival_airport_id = db.Column(UUID(as_uuid=True), db.ForeignKey('airports.airport_id'), nullable=False)
@@ -22,6 +25,15 @@ class UserSearchHistory(Base):
     class_type = db.Column(db.String, default='經濟')
     search_time = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 按用戶或航線篩選後取最新搜索的複合索引，沿索引倒序讀取至 LIMIT 即停止
+    __table_args__ = (
+        db.Index('ix_user_search_history_user_time', 'user_id', 'search_time'),
+        db.Index('ix_user_search_history_route_time', 'departure_airport_id', 'arrival_airport_id', 'search_time'),
+        # 熱門路線統計只需時間範圍內的航線，可由索引直接完成分組計數 (index-only scan)
+        db.Index('ix_user_search_history_time_route', 'search_time',
+                 postgresql_include=['departure_airport_id', 'arrival_airport_id']),
+    )
+    
     # 關聯
     departure_airport = db.relationship('Airport', foreign_keys=[departure_airport_id])
     arrival_airport = db.relationship('Airport', foreign_keys=[arrival_airport_id])
@@ -35,6 +47,7 @@ class UserSearchHistory(Base):
         return cls.query.filter_by(user_id=user_id).order_by(db.desc(cls.search_time)).limit(limit).all()
     
     @classmethod
+    @popular_cache.memoize
     def get_popular_routes(cls, days=30, limit=5):
         """獲取熱門路線"""
         from sqlalchemy import func
@@ -1,16 +1,18 @@
 """
 天氣模型
 """
+from sqlalchemy import cast, select, true, tuple_
+from sqlalchemy.orm import aliased
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-import uuid
 from datetime import datetime, timedelta
-from .base import db, Base
+from uuid import UUID as PyUUID
+from .base import db, Base, uuid7
 
 class Weather(Base):
     """天氣數據模型"""
     __tablename__ = 'weather'
     
-    weather_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    weather_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     airport_id = db.Column(db.String, db.ForeignKey('airports.airport_id'), nullable=False)
     forecast_date = db.Column(db.Date, nullable=False)
     forecast_time = db.Column(db.Time)
@@ -27,6 +29,14 @@ class Weather(Base):
     data_source = db.Column(db.String)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 機場+預報日期+時間的複合索引，供取最新天氣的查詢沿索引倒序定位；
+    # 詳細預報以 @> 包含查詢時使用 GIN 索引
+    __table_args__ = (
+        db.Index('ix_weather_airport_forecast', 'airport_id', 'forecast_date', 'forecast_time'),
+        db.Index('ix_weather_detailed_forecast_gin', 'detailed_forecast',
+                 postgresql_using='gin', postgresql_ops={'detailed_forecast': 'jsonb_path_ops'}),
+    )
+    
     def __repr__(self):
         return f"<Weather {self.airport_id} {self.forecast_date} {self.weather_condition}>"
     
@@ -50,14 +60,48 @@ class Weather(Base):
         }
     
     @classmethod
-    def get_forecast(cls, airport_id, date, is_test_data=False):
+    def get_forecast(cls, airport_id, date):
         """獲取特定機場和日期的天氣預報"""
         return cls.query.filter_by(
             airport_id=airport_id,
-            forecast_date=date,
-            is_test_data=is_test_data
+            forecast_date=date
         ).order_by(cls.forecast_time).all()
     
+    @classmethod
+    def latest_at_statement(cls, airport_id, forecast_date, forecast_time):
+        """
+        構建取機場在指定時刻或之前最新天氣記錄的查詢
+
+        預報時刻由日期及時間兩個欄位組成，以行比較 (forecast_date, forecast_time) <= (日期, 時間)
+        表達；機場相等、預報時刻為範圍，排序與 ix_weather_airport_forecast 索引一致，
+        倒序讀取第一筆即為結果，不需排序。參數可為值，也可為關聯查詢中的欄位表達式
+
+        Args:
+            airport_id: 機場ID
+            forecast_date: 日期
+            forecast_time: 時間
+        """
+        return select(cls).where(
+            cls.airport_id == airport_id,
+            tuple_(cls.forecast_date, cls.forecast_time) <= tuple_(forecast_date, forecast_time)
+        ).order_by(
+            db.desc(cls.forecast_date),
+            db.desc(cls.forecast_time)
+        ).limit(1)
+    
+    @classmethod
+    def get_latest_at(cls, airport_id, moment):
+        """
+        獲取機場在指定時間或之前的最新天氣記錄
+
+        Args:
+            airport_id: 機場ID
+            moment: 時間點 (datetime)
+        """
+        return db.session.scalars(
+            cls.latest_at_statement(airport_id, moment.date(), moment.time())
+        ).first()
+    
     @classmethod
     def get_current_weather(cls, airport_id):
         """
@@ -69,14 +113,40 @@ class Weather(Base):
         Returns:
             最接近當前時間的天氣記錄
         """
-        now = datetime.utcnow()
+        return cls.get_latest_at(airport_id, datetime.utcnow())
+    
+    @classmethod
+    def get_current_weather_many(cls, airport_ids):
+        """
+        批量獲取多個機場的當前天氣
         
-        return cls.query.filter(
-            cls.airport_id == airport_id,
-            cls.forecast_time <= now
-        ).order_by(
-            db.desc(cls.forecast_time)
-        ).first()
+        以 DISTINCT ON (airport_id) 在一次查詢中取得每個機場的最新記錄，
+        排序與 ix_weather_airport_forecast 索引一致
+        
+        Args:
+            airport_ids: 機場ID列表
+            
+        Returns:
+            {機場ID: 天氣記錄} 字典，沒有天氣記錄的機場不包含在內
+        """
+        airport_ids = list(airport_ids)
+        if not airport_ids:
+            return {}
+        
+        now = datetime.utcnow()
+        weathers = db.session.scalars(
+            select(cls).where(
+                cls.airport_id.in_(airport_ids),
+                tuple_(cls.forecast_date, cls.forecast_time) <= tuple_(now.date(), now.time())
+            ).distinct(
+                cls.airport_id
+            ).order_by(
+                cls.airport_id,
+                db.desc(cls.forecast_date),
+                db.desc(cls.forecast_time)
+            )
+        )
+        return {weather.airport_id: weather for weather in weathers}
     
     @classmethod
     def get_weather_forecast(cls, airport_id, days=5):
@@ -92,15 +162,46 @@ class Weather(Base):
         """
         now = datetime.utcnow()
         end_date = now + timedelta(days=days)
+        forecast = tuple_(cls.forecast_date, cls.forecast_time)
         
+        # 預報時刻由日期及時間組成，與取最新天氣相同以行比較表達範圍
         return cls.query.filter(
             cls.airport_id == airport_id,
-            cls.forecast_time >= now,
-            cls.forecast_time <= end_date
+            forecast >= tuple_(now.date(), now.time()),
+            forecast <= tuple_(end_date.date(), end_date.time())
         ).order_by(
+            cls.forecast_date,
             cls.forecast_time
         ).all()
     
+    @classmethod
+    def _flight_weather_statement(cls):
+        """
+        構建航班起飛及降落天氣的查詢，每行為 (航班ID, 起飛天氣, 降落天氣)
+
+        兩個機場的天氣各以一個 LATERAL 子查詢按航班時間取得，與航班一併在單一查詢中返回
+        """
+        from .flight import Flight
+        
+        departure = cls.latest_at_statement(
+            Flight.departure_airport_id,
+            cast(Flight.scheduled_departure, db.Date),
+            cast(Flight.scheduled_departure, db.Time)
+        ).lateral('departure_weather')
+        arrival = cls.latest_at_statement(
+            Flight.arrival_airport_id,
+            cast(Flight.scheduled_arrival, db.Date),
+            cast(Flight.scheduled_arrival, db.Time)
+        ).lateral('arrival_weather')
+        
+        return select(
+            Flight.flight_id, aliased(cls, departure), aliased(cls, arrival)
+        ).select_from(Flight).outerjoin(
+            departure, true()
+        ).outerjoin(
+            arrival, true()
+        )
+    
     @classmethod
     def check_flight_weather(cls, flight_id):
         """
@@ -114,24 +215,41 @@ class Weather(Base):
         """
         from .flight import Flight
         
-        flight = Flight.query.get(flight_id)
-        if not flight:
+        row = db.session.execute(
+            cls._flight_weather_statement().where(Flight.flight_id == flight_id)
+        ).one_or_none()
+        
+        if not row:
             return None, None
+        
+        _, departure_weather, arrival_weather = row
+        return departure_weather, arrival_weather
+    
+    @classmethod
+    def check_flight_weather_many(cls, flight_ids):
+        """
+        批量檢查多個航班的起飛和降落天氣
+        
+        無論航班數量多少都只發送一次查詢，取代逐筆調用 check_flight_weather
+        
+        Args:
+            flight_ids: 航班ID列表
             
-        # 獲取起飛機場的天氣
-        departure_weather = cls.query.filter(
-            cls.airport_id == flight.departure_airport_id,
-            cls.forecast_time <= flight.scheduled_departure
-        ).order_by(
-            db.desc(cls.forecast_time)
-        ).first()
+        Returns:
+            {航班ID (uuid.UUID): (起飛天氣, 降落天氣)} 字典，找不到的航班為 (None, None)
+        """
+        from .flight import Flight
         
-        # 獲取降落機場的天氣
-        arrival_weather = cls.query.filter(
-            cls.airport_id == flight.arrival_airport_id,
-            cls.forecast_time <= flight.scheduled_arrival
-        ).order_by(
-            db.desc(cls.forecast_time)
-        ).first()
+        # 統一為 UUID，與查詢返回的航班ID對應
+        flight_ids = [PyUUID(str(flight_id)) for flight_id in flight_ids]
+        result = {flight_id: (None, None) for flight_id in flight_ids}
+        if not flight_ids:
+            return result
+        
+        rows = db.session.execute(
+            cls._flight_weather_statement().where(Flight.flight_id.in_(flight_ids))
+        )
+        for flight_id, departure_weather, arrival_weather in rows:
+            result[flight_id] = (departure_weather, arrival_weather)
         
-        return departure_weather, arrival_weather 
\ No newline at end of file
+        return result
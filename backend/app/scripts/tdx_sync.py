@@ -30,6 +30,9 @@ class TdxApiClient:
     # 指定航空公司列表
     TARGET_AIRLINES = ['AE', 'B7', 'BR', 'CI', 'CX', 'DA', 'IT', 'JL', 'JX', 'OZ']
     
+    # 各用戶端共用的令牌緩存，以 client_id 為鍵保存 (令牌, 到期時間)
+    token_cache = {}
+    
     def __init__(self):
         """初始化TDX API用戶端"""
         self.client_id = os.environ.get('TDX_CLIENT_ID')
@@ -51,6 +54,12 @@ class TdxApiClient:
         if self.access_token and time.time() < self.token_expiry:
             return self.access_token
         
+        # 同一 client_id 的其他用戶端已取得有效令牌時直接沿用
+        cached = self.token_cache.get(self.client_id)
+        if cached and time.time() < cached[1]:
+            self.access_token, self.token_expiry = cached
+            return self.access_token
+        
         try:
             logger.info("正在獲取TDX API訪問令牌")
             headers = {'content-type': 'application/x-www-form-urlencoded'}
@@ -65,6 +74,7 @@ class TdxApiClient:
                 token_data = response.json()
                 self.access_token = token_data.get('access_token')
                 self.token_expiry = time.time() + token_data.get('expires_in', 1800) - 60  # 提前60秒過期
+                self.token_cache[self.client_id] = (self.access_token, self.token_expiry)
                 logger.info("成功獲取TDX API訪問令牌")
                 return self.access_token
             else:
@@ -109,7 +119,11 @@ class TdxApiClient:
                 elif response.status_code == 401:  # 令牌過期
                     logger.warning("令牌過期，重新獲取")
                     self.access_token = None  # 重置令牌
-                    self._get_token()
+                    self.token_cache.pop(self.client_id, None)
+                    token = self._get_token()
+                    if not token:
+                        return None
+                    headers['Authorization'] = f'Bearer {token}'
                     retry_count += 1
                     continue
                 else:
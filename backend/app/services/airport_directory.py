@@ -0,0 +1,88 @@
+"""
+機場目錄服務
+在進程內保存完整機場列表及其索引，供機場查詢端點共用
+"""
+import time
+import threading
+from collections import defaultdict
+from sqlalchemy import select
+from ..models import Airport
+from ..models.base import fetch_rows
+
+# 機場完整欄位，輸出鍵名直接由SQL標籤決定
+AIRPORT_COLUMNS = (
+    Airport.airport_id.label('id'), Airport.name_zh,
+    Airport.name_en, Airport.city, Airport.city_en,
+    Airport.country, Airport.timezone, Airport.contact_info,
+    Airport.website_url
+)
+
+# 載入所有機場的查詢語句
+AIRPORT_DIRECTORY_QUERY = select(*AIRPORT_COLUMNS)
+
+class AirportDirectory:
+    """
+    機場目錄
+
+    以一次查詢載入所有機場，並預先建立 ID、國家、城市索引；
+    機場數量僅數百筆，整份保存在記憶體中即可
+    """
+
+    def __init__(self, timeout=7200):
+        """
+        初始化機場目錄
+
+        Args:
+            timeout: 目錄有效時間（秒），過期後於下次查詢時重新載入
+        """
+        self.timeout = timeout
+        self.snapshot = None
+        self.expires_at = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        """
+        獲取機場目錄快照
+
+        Returns:
+            dict: 包含 all、taiwan、by_id、by_country、by_city 的快照
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and time.monotonic() < self.expires_at:
+            return snapshot
+
+        with self.lock:
+            if self.snapshot is None or time.monotonic() >= self.expires_at:
+                self.snapshot = self._load()
+                self.expires_at = time.monotonic() + self.timeout
+            return self.snapshot
+
+    def clear(self):
+        """清除目錄，下次查詢時重新載入"""
+        with self.lock:
+            self.snapshot = None
+
+    @staticmethod
+    def _load():
+        """從數據庫載入所有機場並建立索引"""
+        airports = fetch_rows(AIRPORT_DIRECTORY_QUERY)
+
+        by_country = defaultdict(list)
+        by_city = defaultdict(list)
+        for airport in airports:
+            by_country[airport['country']].append(airport)
+            by_city[airport['city']].append(airport)
+
+        # 台灣機場列表不返回國家欄位
+        taiwan = [
+            {key: value for key, value in airport.items() if key != 'country'}
+            for airport in by_country.get('Taiwan', [])
+        ]
+
+        return {
+            'all': airports,
+            'taiwan': taiwan,
+            'by_id': {airport['id']: airport for airport in airports},
+            'by_country': dict(by_country),
+            'by_city': dict(by_city)
+        }
@@ -16,7 +16,8 @@ import httpx
 from fastapi import Depends
 
 # 使用新的數據庫模組
-from app.database.db import get_db, db
+from app.database.db import db
+from app.models.base import uuid7
 
 from app.models.airline import Airline
 from app.models.airport import Airport
@@ -46,6 +47,12 @@ except ImportError:
     except ImportError as e:
         logger.error(f"無法導入ApiSyncManager: {str(e)}")
 
+def clear_airport_caches():
+    """清除進程內的機場目錄及機場響應緩存"""
+    from app import airport_directory, airport_cache
+    airport_directory.clear()
+    airport_cache.clear()
+
 class DataSyncService:
     """數據同步服務 - 負責從外部API同步數據到本地數據庫"""
     
@@ -237,6 +244,10 @@ class DataSyncService:
                     airline_data['website'])
                     new_count += 1
         
+            # 航空公司數據已變更，清除進程內的航空公司響應緩存
+            from app import airline_cache
+            airline_cache.clear()
+        
             return {
                 "status": "success",
                 "message": f"成功同步航空公司數據: 新增 {new_count} 個，更新 {update_count} 個",
@@ -344,6 +355,9 @@ class DataSyncService:
             await self.load_translation_maps()
         
         logger.info(f"機場同步完成: {new_count} 個新增, {update_count} 個更新")
+        
+        # 機場數據已變更，清除進程內的機場目錄及響應緩存
+        clear_airport_caches()
         return {
                 "status": "success",
             "message": f"機場同步完成: {new_count} 個新增, {update_count} 個更新",
@@ -488,8 +502,8 @@ class DataSyncService:
                                             flight_number, scheduled_departure, scheduled_arrival,
                                             status, departure_terminal, departure_gate,
                                             arrival_terminal, arrival_gate, aircraft_type,
-                                            duration_minutes, created_at, updated_at
-                                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, NOW(), NOW())
+                                            duration_minutes, created_at, updated_at, flight_id
+                                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, NOW(), NOW(), $14)
                                         RETURNING flight_id
                                     """, 
                                     flight_data['airline_id'], flight_data['departure_airport_id'],
@@ -498,7 +512,7 @@ class DataSyncService:
                                     flight_data['status'], flight_data['departure_terminal'],
                                     flight_data['departure_gate'], flight_data['arrival_terminal'],
                                     flight_data['arrival_gate'], flight_data['aircraft_type'],
-                                    flight_data['duration_minutes'])
+                                    flight_data['duration_minutes'], uuid7())
                                     new_count += 1
                                 
                                 # 處理票價信息
@@ -508,6 +522,10 @@ class DataSyncService:
                                 logger.error(f"同步航班時出錯: {str(e)}")
         
         logger.info(f"航班同步完成: {new_count} 個新增, {update_count} 個更新")
+        
+        # 航班數據已變更，清除進程內的航線機場響應緩存
+        from app import route_airport_cache
+        route_airport_cache.clear()
         return {
                 "status": "success",
             "message": f"航班同步完成: {new_count} 個新增, {update_count} 個更新",
@@ -600,6 +618,10 @@ class DataSyncService:
                 airport['icao_code'], airport['latitude'], airport['longitude'],
                 airport['altitude'], airport['timezone'], airport['is_active'],
                 iata_code)
+                
+                # 機場數據已變更，清除進程內的機場目錄及響應緩存
+                clear_airport_caches()
+                
                 logger.info(f"已更新機場: {iata_code}")
                 return {"status": "success", "message": f"已更新機場: {iata_code}", "action": "update"}
             else:
@@ -615,6 +637,10 @@ class DataSyncService:
                 iata_code, airport['icao_code'], airport['latitude'],
                 airport['longitude'], airport['altitude'], airport['timezone'],
                 airport['is_active'])
+                
+                # 機場數據已變更，清除進程內的機場目錄及響應緩存
+                clear_airport_caches()
+                
                 logger.info(f"已新增機場: {iata_code}")
                 return {"status": "success", "message": f"已新增機場: {iata_code}", "action": "insert"}
     
@@ -659,9 +685,9 @@ class DataSyncService:
                 # 插入新價格
                 await conn.execute("""
                     INSERT INTO ticket_prices (
-                        flight_id, class_type, base_price, available_seats, price_updated_at
-                    ) VALUES ($1, $2, $3, $4, NOW())
-                """, flight_id, class_type, price, available_seats)
+                        price_id, flight_id, class_type, base_price, available_seats, price_updated_at
+                    ) VALUES ($5, $1, $2, $3, $4, NOW())
+                """, flight_id, class_type, price, available_seats, uuid7())
     
     async def _fetch_airlines_from_api(self):
         """從API獲取航空公司數據"""
@@ -916,6 +942,11 @@ class DataSyncService:
                         logger.error(f"導入航班 {flight.get('flight_number')} 時出錯: {str(e)}")
                         # 繼續處理其他航班，不中斷整個事務
         
+        # 航班數據已變更，清除進程內的航線機場響應緩存
+        if imported_count:
+            from app import route_airport_cache
+            route_airport_cache.clear()
+        
         return imported_count
     
     async def _get_existing_airlines_airports(self, pool):
@@ -968,34 +999,37 @@ class DataSyncService:
         if 'economy_price' in flight:
             await conn.execute("""
                 INSERT INTO ticket_prices (
-                    flight_id, class_type, base_price, available_seats, price_updated_at
-                ) VALUES ($1, 'economy', $2, $3, NOW())
+                    price_id, flight_id, class_type, base_price, available_seats, price_updated_at
+                ) VALUES ($4, $1, 'economy', $2, $3, NOW())
             """,
             flight_id,
             flight['economy_price'],
-            flight.get('available_seats', 100)  # 默認100個座位
+            flight.get('available_seats', 100),  # 默認100個座位
+            uuid7()
             )
         
         # 插入商務艙票價
         if 'business_price' in flight:
             await conn.execute("""
                 INSERT INTO ticket_prices (
-                    flight_id, class_type, base_price, available_seats, price_updated_at
-                ) VALUES ($1, 'business', $2, $3, NOW())
+                    price_id, flight_id, class_type, base_price, available_seats, price_updated_at
+                ) VALUES ($4, $1, 'business', $2, $3, NOW())
             """,
             flight_id,
             flight['business_price'],
-            flight.get('available_seats_business', 20)  # 默認20個座位
+            flight.get('available_seats_business', 20),  # 默認20個座位
+            uuid7()
             )
         
         # 插入頭等艙票價
         if 'first_price' in flight:
             await conn.execute("""
                 INSERT INTO ticket_prices (
-                    flight_id, class_type, base_price, available_seats, price_updated_at
-                ) VALUES ($1, 'first', $2, $3, NOW())
+                    price_id, flight_id, class_type, base_price, available_seats, price_updated_at
+                ) VALUES ($4, $1, 'first', $2, $3, NOW())
             """,
             flight_id,
             flight['first_price'],
-            flight.get('available_seats_first', 10)  # 默認10個座位
+            flight.get('available_seats_first', 10),  # 默認10個座位
+            uuid7()
             ) 
\ No newline at end of file
@@ -91,11 +91,7 @@ class PriceService:
         ).all()
         
         # 格式化結果
-        price_map = {}
-        for date_obj, price in results:
-            price_map[date_obj.isoformat()] = float(price)
-            
-        return price_map
+        return {date_obj.isoformat(): float(price) for date_obj, price in results}
     
     @staticmethod
     def get_price_history(flight_id, class_type='經濟艙', days=30):
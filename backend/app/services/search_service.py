@@ -4,13 +4,16 @@
 飛行搜索服務模組 - 處理航班搜尋的業務邏輯
 """
 
+import asyncio
 import logging
+import threading
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple, Union
 from sqlalchemy.sql import text, func
 
 # 移除 SQLAlchemy 相關導入
-from app.database.db import get_db, release_db
+from app.database.db import acquire_read, db as sqlalchemy_db
 # 這些模型現在僅用於類型提示
 from app.models.airline import Airline
 from app.models.airport import Airport
@@ -22,6 +25,14 @@ logger = logging.getLogger(__name__)
 class SearchService:
     """搜索服務 - 處理航班搜索的業務邏輯"""
     
+    # 艙等名稱與結果鍵的對應
+    CABIN_KEYS = {"經濟": "economy", "商務": "business", "頭等": "first"}
+    
+    # 進行中的搜索，以搜索參數為鍵；
+    # 各請求在各自的事件循環中執行，因此使用執行緒安全的 Future 共用結果
+    _inflight: Dict[tuple, Future] = {}
+    _inflight_lock = threading.Lock()
+    
     @staticmethod
     async def search_flights(
         departure_code: str,
@@ -39,6 +50,8 @@ class SearchService:
         """
         執行航班搜索
         
+        參數相同的並發搜索只查詢一次數據庫，其餘請求等待並共用同一結果
+        
         Args:
             departure_code: 出發地IATA代碼
             arrival_code: 目的地IATA代碼
@@ -55,76 +68,139 @@ class SearchService:
         Returns:
             Dict[str, Any]: 搜索結果
         """
-        # 獲取數據庫連接
-        db = await get_db()
-        
-        # 查詢航班
-        outbound_flights = await SearchService._query_flights(
-            db, departure_code, arrival_code, date_str, 
-            airline_code, price_min, price_max, 
-            cabin_class, max_results, sort_by
+        args = (
+            departure_code, arrival_code, date_str,
+            airline_code, return_date_str,
+            price_min, price_max, cabin_class,
+            passengers, max_results, sort_by
         )
+        airlines_key = airline_code if airline_code is None or isinstance(airline_code, str) else tuple(airline_code)
+        key = args[:3] + (airlines_key,) + args[4:]
         
-        # 生成三種艙等的航班數據
-        cabin_classes = ["經濟", "商務", "頭等"]
-        outbound_results = {
-            "economy": await SearchService._format_flights(outbound_flights, "經濟"),
-            "business": await SearchService._format_flights(outbound_flights, "商務"),
-            "first": await SearchService._format_flights(outbound_flights, "頭等")
-        }
+        with SearchService._inflight_lock:
+            future = SearchService._inflight.get(key)
+            # 已取消的搜索可能尚未移除，不再等待
+            is_leader = future is None or future.cancelled()
+            if is_leader:
+                future = Future()
+                SearchService._inflight[key] = future
+        
+        # 已有相同搜索在進行中，等待其結果；
+        # 以 shield 隔開，本請求被取消時不會連帶取消共用的 Future
+        if not is_leader:
+            try:
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                # 進行中的搜索被取消而非本請求被取消時，自行重新搜索
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await SearchService.search_flights(*args)
+                raise
         
-        # 如果提供了回程日期，也查詢回程航班
-        inbound_results = None
-        if return_date_str:
-            inbound_flights = await SearchService._query_flights(
-                db, arrival_code, departure_code, return_date_str, 
+        try:
+            result = await SearchService._search_flights(*args)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # 取消只屬於發起搜索的請求，等待中的請求會各自重試
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with SearchService._inflight_lock:
+                if SearchService._inflight.get(key) is future:
+                    del SearchService._inflight[key]
+    
+    @staticmethod
+    async def _search_flights(
+        departure_code: str,
+        arrival_code: str,
+        date_str: str,
+        airline_code: Optional[Union[str, List[str]]] = None,
+        return_date_str: Optional[str] = None,
+        price_min: Optional[int] = None,
+        price_max: Optional[int] = None,
+        cabin_class: str = "經濟",
+        passengers: int = 1,
+        max_results: int = 20,
+        sort_by: str = "price"
+    ) -> Dict[str, Any]:
+        """
+        執行航班搜索（不合併並發請求）
+        
+        Args:
+            departure_code: 出發地IATA代碼
+            arrival_code: 目的地IATA代碼
+            date_str: 去程日期 (YYYY-MM-DD)
+            airline_code: 航空公司IATA代碼，可選
+            return_date_str: 回程日期 (YYYY-MM-DD)，可選
+            price_min: 最低價格，可選
+            price_max: 最高價格，可選
+            cabin_class: 艙位類型
+            passengers: 乘客數量
+            max_results: 每個方向的最大結果數
+            sort_by: 排序方式
+        
+        Returns:
+            Dict[str, Any]: 搜索結果
+        """
+        # 獲取數據庫連接
+        async with acquire_read() as db:
+            # 查詢航班
+            outbound_flights = await SearchService._query_flights(
+                db, departure_code, arrival_code, date_str, 
                 airline_code, price_min, price_max, 
                 cabin_class, max_results, sort_by
             )
-            inbound_results = {
-                "economy": await SearchService._format_flights(inbound_flights, "經濟"),
-                "business": await SearchService._format_flights(inbound_flights, "商務"),
-                "first": await SearchService._format_flights(inbound_flights, "頭等")
-            }
             
+            # 如果提供了回程日期，也查詢回程航班
+            inbound_flights = None
+            if return_date_str:
+                inbound_flights = await SearchService._query_flights(
+                    db, arrival_code, departure_code, return_date_str, 
+                    airline_code, price_min, price_max, 
+                    cabin_class, max_results, sort_by
+                )
+        
+        # 所選艙等對應的結果鍵，未知艙等使用經濟艙
+        cabin_key = SearchService.CABIN_KEYS.get(cabin_class.replace("艙", ""), "economy")
+        
+        # 生成三種艙等的航班數據
+        outbound_results = await SearchService._format_cabins(outbound_flights)
+        
         # 準備結果
         result = {
-            "outbound": outbound_results.get(cabin_class.lower().replace("艙", ""), outbound_results["economy"]),
-            "all_cabins": {
-                "economy": {
-                    "name": "經濟艙",
-                    "flights": outbound_results["economy"]
-                },
-                "business": {
-                    "name": "商務艙",
-                    "flights": outbound_results["business"]
-                },
-                "first": {
-                    "name": "頭等艙",
-                    "flights": outbound_results["first"]
-                }
-            }
+            "outbound": outbound_results[cabin_key]["flights"],
+            "all_cabins": outbound_results
         }
         
-        if inbound_results:
-            result["inbound"] = inbound_results.get(cabin_class.lower().replace("艙", ""), inbound_results["economy"])
-            result["all_cabins"]["return"] = {
-                "economy": {
-                    "name": "經濟艙",
-                    "flights": inbound_results["economy"]
-                },
-                "business": {
-                    "name": "商務艙",
-                    "flights": inbound_results["business"]
-                },
-                "first": {
-                    "name": "頭等艙",
-                    "flights": inbound_results["first"]
-                }
-            }
+        if inbound_flights is not None:
+            inbound_results = await SearchService._format_cabins(inbound_flights)
+            result["inbound"] = inbound_results[cabin_key]["flights"]
+            result["all_cabins"]["return"] = inbound_results
             
         return result
     
+    @staticmethod
+    async def _format_cabins(flights: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        為每種艙等格式化航班列表
+        
+        Args:
+            flights: 航班列表
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: 以艙等鍵（economy/business/first）分組的航班列表
+        """
+        results = {}
+        for cabin_name, cabin_key in SearchService.CABIN_KEYS.items():
+            results[cabin_key] = {
+                "name": f"{cabin_name}艙",
+                "flights": await SearchService._format_flights(flights, cabin_name)
+            }
+        return results
+    
     @staticmethod
     async def _query_flights(
         db,
@@ -192,27 +268,24 @@ class SearchService:
         WHERE 
             a_dep.airport_id = $1
             AND a_arr.airport_id = $2
-            AND DATE(f.scheduled_departure) = $3
+            AND f.scheduled_departure >= $3::date
+            AND f.scheduled_departure < $3::date + 1
         """
         
         params = [departure_code, arrival_code, flight_date]
         param_index = 4
         
-        # 添加航空公司過濾 - 處理字符串或列表
+        # 添加航空公司過濾 - 處理字符串或代碼序列
         if airline_code:
-            if isinstance(airline_code, list):
-                # 如果是列表，使用 IN 操作符
-                placeholders = []
-                for code in airline_code:
-                    placeholders.append(f"${param_index}")
-                    params.append(code)
-                    param_index += 1
-                sql += f" AND al.airline_id IN ({', '.join(placeholders)})"
-            else:
+            if isinstance(airline_code, str):
                 # 如果是字符串，使用等號
                 sql += f" AND al.airline_id = ${param_index}"
                 params.append(airline_code)
-                param_index += 1
+            else:
+                # 如果是列表或元組，以單一陣列參數比對，SQL文字不隨代碼數量改變
+                sql += f" AND al.airline_id = ANY(${param_index})"
+                params.append(list(airline_code))
+            param_index += 1
         
         # 添加排序 - 移除價格排序，改用出發時間
         sql += " ORDER BY f.scheduled_departure"
@@ -343,8 +416,8 @@ class SearchService:
         Returns:
             Dict[str, Any]: 各日期的最低價格
         """
-        # 獲取數據庫連接
-        db = await get_db()
+        # 報表查詢以 SQLAlchemy 會話執行
+        db = sqlalchemy_db.session
         
         # 解析日期
         try:
@@ -369,7 +442,8 @@ class SearchService:
                 WHERE 
                     f.departure_airport_id = :departure_code
                     AND f.arrival_airport_id = :arrival_code
-                    AND DATE(f.scheduled_departure) BETWEEN :start_date AND :end_date
+                    AND f.scheduled_departure >= CAST(:start_date AS date)
+                    AND f.scheduled_departure < CAST(:end_date AS date) + 1
                     AND tp.class_type = :cabin_class
                 GROUP BY 
                     DATE(f.scheduled_departure)
@@ -423,8 +497,8 @@ class SearchService:
         Returns:
             Dict[str, Any]: 價格趨勢數據
         """
-        # 獲取數據庫連接
-        db = await get_db()
+        # 報表查詢以 SQLAlchemy 會話執行
+        db = sqlalchemy_db.session
         
         # 解析日期
         try:
@@ -439,7 +513,8 @@ class SearchService:
             flights = db.query(Flight.flight_id).filter(
                 Flight.departure_airport_id == departure_code,
                 Flight.arrival_airport_id == arrival_code,
-                func.date(Flight.scheduled_departure) == flight_date
+                Flight.scheduled_departure >= flight_date,
+                Flight.scheduled_departure < flight_date + timedelta(days=1)
             ).all()
             
             if not flights:
@@ -507,8 +582,8 @@ class SearchService:
         Returns:
             Dict[str, Any]: 航線統計信息
         """
-        # 獲取數據庫連接
-        db = await get_db()
+        # 報表查詢以 SQLAlchemy 會話執行
+        db = sqlalchemy_db.session
         
         try:
             # 查詢航線的航班數量
@@ -591,40 +666,24 @@ class SearchService:
         Returns:
             List[Dict[str, Any]]: 航空公司列表
         """
-        db = await get_db()
-        try:
+        async with acquire_read() as db:
             query = """
             SELECT 
                 airline_id, 
                 airline_id as iata_code, 
-                name_zh, 
+                name_zh as name, 
                 name_en, 
-                is_domestic
+                'https://example.com/airlines/' || airline_id || '.png' as logo_url,
+                CASE WHEN is_domestic THEN '台灣' ELSE '國際' END as country
             FROM 
                 airlines
             ORDER BY 
                 name_zh
             """
             
+            # 輸出鍵名直接由SQL別名決定（logo_url 使用固定模板生成）
             airlines = await db.fetch(query)
-            result = []
-            
-            for airline in airlines:
-                # 使用固定模板生成logo_url
-                logo_url = f"https://example.com/airlines/{airline['airline_id']}.png"
-                
-                result.append({
-                    'airline_id': airline['airline_id'],
-                    'iata_code': airline['iata_code'],
-                    'name': airline['name_zh'],
-                    'name_en': airline['name_en'],
-                    'logo_url': logo_url,
-                    'country': '台灣' if airline.get('is_domestic') else '國際'
-                })
-            
-            return result
-        finally:
-            await release_db(db)
+            return [dict(airline) for airline in airlines]
     
     @staticmethod
     async def get_taiwan_airports():
@@ -634,13 +693,12 @@ class SearchService:
         Returns:
             List[Dict[str, Any]]: 機場列表，只包含有航班的機場
         """
-        db = await get_db()
-        try:
+        async with acquire_read() as db:
             query = """
             SELECT DISTINCT
                 a.airport_id, 
                 a.airport_id as iata_code, 
-                a.name_zh, 
+                a.name_zh as name, 
                 a.name_en, 
                 a.city, 
                 a.country
@@ -652,25 +710,11 @@ class SearchService:
                 a.country = 'Taiwan'
                 AND f.scheduled_departure >= CURRENT_DATE
             ORDER BY 
-                a.name_zh
+                name
             """
             
             airports = await db.fetch(query)
-            result = []
-            
-            for airport in airports:
-                result.append({
-                    'airport_id': airport['airport_id'],
-                    'iata_code': airport['iata_code'],
-                    'name': airport['name_zh'],
-                    'name_en': airport['name_en'],
-                    'city': airport['city'],
-                    'country': airport['country']
-                })
-            
-            return result
-        finally:
-            await release_db(db)
+            return [dict(airport) for airport in airports]
     
     @staticmethod
     async def get_available_destinations(departure_iata, date_str=None):
@@ -684,15 +728,14 @@ class SearchService:
         Returns:
             List[Dict[str, Any]]: 目的地列表
         """
-        db = await get_db()
-        try:
+        async with acquire_read() as db:
             params = [departure_iata]
             date_filter = ""
             
             if date_str:
                 try:
                     flight_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    date_filter = "AND DATE(f.scheduled_departure) = $2"
+                    date_filter = "AND f.scheduled_departure >= $2::date AND f.scheduled_departure < $2::date + 1"
                     params.append(flight_date)
                 except ValueError:
                     logger.error(f"日期格式錯誤: {date_str}")
@@ -701,7 +744,7 @@ class SearchService:
             SELECT DISTINCT 
                 a.airport_id, 
                 a.airport_id as iata_code, 
-                a.name_zh, 
+                a.name_zh as name, 
                 a.name_en, 
                 a.city, 
                 a.country,
@@ -723,19 +766,4 @@ class SearchService:
             """
             
             destinations = await db.fetch(query, *params)
-            result = []
-            
-            for dest in destinations:
-                result.append({
-                    'airport_id': dest['airport_id'],
-                    'iata_code': dest['iata_code'],
-                    'name': dest['name_zh'],
-                    'name_en': dest['name_en'],
-                    'city': dest['city'],
-                    'country': dest['country'],
-                    'flight_count': dest['flight_count']
-                })
-            
-            return result
-        finally:
-            await release_db(db) 
\ No newline at end of file
+            return [dict(dest) for dest in destinations]
\ No newline at end of file
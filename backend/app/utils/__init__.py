@@ -7,17 +7,30 @@
 3. 提供輔助功能和實用工具
 """
 
-from app.utils.api_client import ApiClient
-from app.utils.token_manager import TokenManager
-from app.utils.mock_data_generator import MockDataGenerator
-from app.utils.rate_limiter import RateLimiter
-from app.utils.http_client import HttpClient
+import importlib
+
+# 導出的工具類及其所在模塊；首次存取時才導入，
+# 導入 app 包時不會連帶載入 requests 等 API 客戶端依賴
+_EXPORTS = {
+    'ApiClient': 'app.utils.api_client',
+    'TokenManager': 'app.utils.token_manager',
+    'MockDataGenerator': 'app.utils.mock_data_generator',
+    'RateLimiter': 'app.utils.rate_limiter',
+    'HttpClient': 'app.utils.http_client',
+    'TaskRunner': 'app.utils.task_runner',
+    'ResponseCache': 'app.utils.response_cache',
+    'etag_cached': 'app.utils.response_cache',
+    'QueryCache': 'app.utils.query_cache',
+    'stream_json': 'app.utils.json_stream'
+}
 
 # 導出所有工具類，便於在其他模塊中使用
-__all__ = [
-    'ApiClient',
-    'TokenManager',
-    'MockDataGenerator',
-    'RateLimiter',
-    'HttpClient'
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """按需導入工具類"""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
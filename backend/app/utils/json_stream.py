@@ -0,0 +1,55 @@
+"""
+JSON串流工具 - 逐筆序列化大型JSON響應
+"""
+from typing import Any, Callable, Iterator
+from flask import current_app
+
+def _iter_json(value: Any, dumps: Callable[[Any], str]) -> Iterator[str]:
+    """
+    逐段產生JSON文本
+
+    字典逐鍵展開、列表逐項序列化，列表中的每筆數據（如航班）只在輸出時才編碼
+
+    Args:
+        value: 要序列化的數據
+        dumps: JSON序列化函數
+    """
+    if isinstance(value, dict):
+        yield '{'
+        for index, (key, item) in enumerate(value.items()):
+            yield f'{"," if index else ""}{dumps(str(key))}:'
+            yield from _iter_json(item, dumps)
+        yield '}'
+    elif isinstance(value, (list, tuple)):
+        yield '['
+        for index, item in enumerate(value):
+            yield f'{"," if index else ""}{dumps(item)}'
+        yield ']'
+    else:
+        yield dumps(value)
+
+def stream_json(data: Any, status: int = 200):
+    """
+    以串流方式返回JSON響應
+
+    客戶端在整份結果序列化完成前即可開始接收，
+    且不需在記憶體中組出完整的JSON字串
+
+    Args:
+        data: 要序列化的數據
+        status: HTTP狀態碼
+
+    Returns:
+        串流響應對象
+    """
+    provider = current_app.json
+
+    # 串流在請求上下文結束後才執行，預先綁定序列化函數
+    def dumps(value):
+        return provider.dumps(value, separators=(',', ':'))
+
+    def generate():
+        for chunk in _iter_json(data, dumps):
+            yield chunk.encode('utf-8')
+
+    return current_app.response_class(generate(), status=status, mimetype='application/json')
@@ -0,0 +1,49 @@
+"""
+性能分析工具 - 逐請求分析與慢查詢記錄，僅在設置 PROFILE 環境變量時啟用
+"""
+import os
+import time
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.middleware.profiler import ProfilerMiddleware
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+# 慢查詢閾值（秒）
+slow_query_threshold = float(os.environ.get('PROFILE_SQL_THRESHOLD', '0.1'))
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """記錄SQL語句開始執行時間"""
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """SQL語句執行時間超過閾值時記錄到日誌"""
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if elapsed >= slow_query_threshold:
+        logger.warning(f"慢查詢 ({elapsed:.3f}s): {statement}")
+
+def setup_profiling(app, profile_dir=None):
+    """
+    啟用請求分析與慢查詢記錄
+
+    每個請求的 cProfile 結果寫入 profile_dir（可用 snakeviz 等工具查看），
+    執行時間超過 PROFILE_SQL_THRESHOLD 秒（默認 0.1）的 SQL 語句會記錄到日誌
+
+    Args:
+        app: Flask 應用
+        profile_dir: 分析結果目錄，默認為 logs/profile
+    """
+    if profile_dir is None:
+        profile_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs', 'profile')
+    os.makedirs(profile_dir, exist_ok=True)
+    
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app, stream=None, profile_dir=profile_dir)
+    
+    # 監聽器註冊於 Engine 類別，對所有引擎生效，只需註冊一次
+    if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+    
+    logger.info(f"性能分析已啟用，結果目錄: {profile_dir}")
@@ -0,0 +1,66 @@
+"""
+查詢緩存工具 - 在進程內緩存查詢結果
+"""
+import time
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class QueryCache:
+    """
+    進程內查詢結果緩存
+
+    以函數及參數為鍵保存查詢結果，在有效時間內重複調用直接返回；
+    條目數達到上限時先淘汰過期條目，仍不足時淘汰最早寫入的條目。
+    只適合緩存與數據庫會話無關的結果（如聚合統計的行），不應緩存ORM實例
+    """
+
+    def __init__(self, timeout: int = 3600, max_size: int = 256):
+        """
+        初始化查詢緩存
+
+        Args:
+            timeout: 緩存有效時間（秒）
+            max_size: 最多保存的條目數
+        """
+        self.timeout = timeout
+        self.max_size = max_size
+        self.entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.lock = threading.Lock()
+
+    def memoize(self, func: Callable) -> Callable:
+        """
+        緩存函數的返回值
+
+        Args:
+            func: 要緩存的函數，參數須可雜湊
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+            value = func(*args, **kwargs)
+            with self.lock:
+                self._evict()
+                self.entries[key] = (time.monotonic() + self.timeout, value)
+            return value
+        return wrapper
+
+    def _evict(self):
+        """達到容量上限時淘汰條目，需在持有鎖時調用"""
+        if len(self.entries) < self.max_size:
+            return
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self.entries.items() if expires_at <= now]:
+            del self.entries[key]
+        # 字典保持寫入順序，最早寫入的條目在最前
+        while len(self.entries) >= self.max_size:
+            del self.entries[next(iter(self.entries))]
+
+    def clear(self):
+        """清除所有緩存"""
+        with self.lock:
+            self.entries.clear()
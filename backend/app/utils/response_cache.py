@@ -0,0 +1,107 @@
+"""
+響應緩存工具 - 在進程內緩存已序列化的JSON響應
+"""
+import time
+import threading
+from functools import wraps
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from flask import current_app, request
+from werkzeug.http import generate_etag
+
+class CachedBody(NamedTuple):
+    """已序列化的JSON響應及其ETag"""
+    body: bytes
+    etag: str
+
+class ResponseCache:
+    """
+    進程內JSON響應緩存
+
+    以鍵保存已序列化的JSON位元組，命中時直接返回，
+    省去緩存後端的反序列化及每次請求的JSON編碼；
+    ETag 於寫入時計算一次，客戶端帶 If-None-Match 重複請求時返回 304
+    """
+
+    def __init__(self, timeout: int = 3600):
+        """
+        初始化響應緩存
+
+        Args:
+            timeout: 緩存有效時間（秒）
+        """
+        self.timeout = timeout
+        self.entries: Dict[str, Tuple[float, CachedBody]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        """
+        獲取緩存的JSON響應
+
+        Args:
+            key: 緩存鍵
+
+        Returns:
+            緩存的JSON響應，不存在或已過期時返回 None
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: str, data: Any) -> CachedBody:
+        """
+        序列化並緩存數據
+
+        Args:
+            key: 緩存鍵
+            data: 要序列化的數據
+
+        Returns:
+            序列化後的JSON響應
+        """
+        # 與 jsonify 輸出一致
+        body = current_app.json.response(data).get_data()
+        cached = CachedBody(body, generate_etag(body))
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, cached)
+        return cached
+
+    def clear(self):
+        """清除所有緩存"""
+        with self.lock:
+            self.entries.clear()
+
+    def response(self, cached: CachedBody, status: int = 200):
+        """將緩存的JSON包裝為響應對象，ETag 相符時返回 304"""
+        response = current_app.response_class(cached.body, status=status, mimetype='application/json')
+        response.set_etag(cached.etag)
+        return response.make_conditional(request)
+
+def etag_cached(cache, **cache_options):
+    """
+    以 Flask-Caching 緩存視圖響應並附加 ETag
+
+    ETag 於響應寫入緩存前計算一次，與響應一同保存；
+    每次請求（包括緩存命中）在 If-None-Match 相符時返回 304
+
+    Args:
+        cache: Flask-Caching 緩存實例
+        **cache_options: 傳給 cache.cached 的參數，如 timeout、query_string
+    """
+    def decorator(view):
+        @wraps(view)
+        def tagged_view(*args, **kwargs):
+            response = current_app.make_response(current_app.ensure_sync(view)(*args, **kwargs))
+            if response.status_code == 200:
+                response.add_etag()
+            return response
+
+        cached_view = cache.cached(**cache_options)(tagged_view)
+
+        @wraps(view)
+        def conditional_view(*args, **kwargs):
+            response = current_app.make_response(cached_view(*args, **kwargs))
+            return response.make_conditional(request)
+
+        return conditional_view
+    return decorator
@@ -0,0 +1,98 @@
+"""
+背景任務執行工具 - 將耗時任務移出請求線程
+"""
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+class TaskRunner:
+    """
+    背景任務執行器 - 以線程池執行任務並記錄任務狀態
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_ERROR = 'error'
+
+    def __init__(self, max_workers: int = 1, max_records: int = 100):
+        """
+        初始化任務執行器
+
+        Args:
+            max_workers: 同時執行的最大任務數
+            max_records: 保留的任務狀態記錄數量，超過時移除最舊的記錄
+        """
+        self.max_records = max_records
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task-runner')
+        self.tasks: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, func: Callable, *args, **kwargs) -> str:
+        """
+        提交任務到背景執行
+
+        Args:
+            func: 要執行的函數
+            *args, **kwargs: 傳給函數的參數
+
+        Returns:
+            任務ID
+        """
+        task_id = uuid.uuid4().hex
+
+        with self.lock:
+            self.tasks[task_id] = {
+                'task_id': task_id,
+                'status': self.STATUS_PENDING,
+                'submitted_at': datetime.now().isoformat(),
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            # 移除最舊的記錄
+            while len(self.tasks) > self.max_records:
+                self.tasks.popitem(last=False)
+
+        self.executor.submit(self._run, task_id, func, args, kwargs)
+        return task_id
+
+    def get_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        獲取任務狀態
+
+        Args:
+            task_id: 任務ID
+
+        Returns:
+            任務狀態字典，找不到時返回 None
+        """
+        with self.lock:
+            task = self.tasks.get(task_id)
+            return dict(task) if task else None
+
+    def _update(self, task_id: str, **fields):
+        """更新任務狀態（記錄已被移除時忽略）"""
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task:
+                task.update(fields)
+
+    def _run(self, task_id: str, func: Callable, args: tuple, kwargs: dict):
+        """在工作線程中執行任務"""
+        self._update(task_id, status=self.STATUS_RUNNING)
+        try:
+            result = func(*args, **kwargs)
+            self._update(task_id, status=self.STATUS_SUCCESS, result=result,
+                         finished_at=datetime.now().isoformat())
+        except Exception as e:
+            logger.error(f"背景任務 {task_id} 執行失敗: {str(e)}", exc_info=True)
+            self._update(task_id, status=self.STATUS_ERROR, error=str(e),
+                         finished_at=datetime.now().isoformat())
@@ -0,0 +1,3 @@
+"""
+應用配置模組 - 各環境配置以模組常量定義，由 create_app 透過 from_object 載入
+"""
@@ -0,0 +1,20 @@
+"""
+基本配置 - 開發與測試環境使用
+"""
+import os
+
+from app.database.db import get_db_url
+
+# 安全密鑰
+SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
+
+# 數據庫配置
+SQLALCHEMY_DATABASE_URI = get_db_url()
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# 緩存配置
+CACHE_TYPE = 'SimpleCache'
+CACHE_DEFAULT_TIMEOUT = 300
+
+# 日誌級別
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -0,0 +1,11 @@
+"""
+生產環境配置
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+# 日誌級別
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'WARNING')
@@ -11,7 +11,9 @@ import json
 import logging
 import argparse
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
+from sqlalchemy.engine import URL
 
 # 添加應用程式路徑
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -210,7 +212,11 @@ class FlightDataSyncTool:
                 if not all([db_user, db_password, db_host]):
                     raise ValueError("缺少資料庫連接所需的基本環境變數")
                 
-                conn_str = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+                # 由 URL.create 轉義密碼中的特殊字元
+                conn_str = URL.create(
+                    "postgresql", username=db_user, password=db_password,
+                    host=db_host, port=int(db_port), database=db_name
+                ).render_as_string(hide_password=False)
             
             conn = psycopg2.connect(conn_str)
             if conn:
@@ -277,6 +283,34 @@ class FlightDataSyncTool:
         print(f"更新: {result.get('updated', 0)}")
         print(f"跳過: {result.get('skipped', 0)}")
     
+    def _sync_airlines_data(self):
+        """從API獲取航空公司數據並同步到資料庫"""
+        airlines = self.api_manager.sync_airlines()
+        if airlines:
+            self.db_manager.sync_airlines(airlines)
+        return airlines
+    
+    def _sync_airports_data(self):
+        """從API獲取機場數據並同步到資料庫"""
+        airports = self.api_manager.sync_airports()
+        if airports:
+            self.db_manager.sync_airports(airports)
+        return airports
+    
+    def sync_reference_data(self):
+        """
+        同步航空公司和機場基礎資料
+        
+        兩者互不依賴，各自的API請求和資料庫寫入並行執行
+        
+        Returns:
+            tuple: (航空公司列表, 機場列表)
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            airlines_future = executor.submit(self._sync_airlines_data)
+            airports_future = executor.submit(self._sync_airports_data)
+            return airlines_future.result(), airports_future.result()
+    
     def sync_flights_route(self, departure, arrival, date_str, days=1, limit=0):
         """同步特定航線的航班數據"""
         logger.info(f"開始同步 {departure} -> {arrival} 航線的航班數據...")
@@ -285,14 +319,10 @@ class FlightDataSyncTool:
         logger.info("確保基礎資料已同步...")
         try:
             # 只載入一次基礎資料
-            airlines = self.api_manager.sync_airlines()
-            if airlines and len(airlines) > 0:
-                self.db_manager.sync_airlines(airlines)
+            airlines, airports = self.sync_reference_data()
+            if airlines:
                 logger.info(f"成功同步 {len(airlines)} 個航空公司資料")
-                
-            airports = self.api_manager.sync_airports()
-            if airports and len(airports) > 0:
-                self.db_manager.sync_airports(airports)
+            if airports:
                 logger.info(f"成功同步 {len(airports)} 個機場資料")
                 
             # 獲取航空公司和機場映射
@@ -365,13 +395,7 @@ class FlightDataSyncTool:
         
         # 首先確保航空公司和機場資料已同步
         logger.info("確保航空公司和機場資料已同步...")
-        airlines = self.api_manager.sync_airlines()
-        if airlines:
-            self.db_manager.sync_airlines(airlines)
-            
-        airports = self.api_manager.sync_airports()
-        if airports:
-            self.db_manager.sync_airports(airports)
+        self.sync_reference_data()
         
         # 獲取航空公司和機場映射
         airlines_map, airports_map = self.db_manager.get_existing_airlines_airports()
@@ -478,17 +502,42 @@ class FlightDataSyncTool:
             logger.error("連接測試失敗，無法進行同步")
             return
         
-        # 同步航空公司數據
-        self.sync_airlines()
-        
-        # 同步機場數據
-        self.sync_airports()
+        # 並行同步航空公司和機場數據
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            airlines_future = executor.submit(self.sync_airlines)
+            airports_future = executor.submit(self.sync_airports)
+            airlines_future.result()
+            airports_future.result()
         
         # 同步台灣出發的航班數據
         self.sync_taiwan_flights(date_str, days)
         
         print("\n=== 全面數據同步完成 ===")
 
+def snapshot_prices():
+    """記錄所有未起飛航班的現行票價至價格歷史"""
+    import asyncio
+    from app.models import PriceHistory
+    from app.database.db import close_asyncpg_pool
+    
+    async def run():
+        try:
+            return await PriceHistory.snapshot_prices()
+        finally:
+            await close_asyncpg_pool()
+    
+    count = asyncio.run(run())
+    logger.info(f"已記錄 {count} 筆票價快照")
+    print(f"\n=== 票價快照完成：{count} 筆 ===")
+
+def create_indexes():
+    """在數據庫上建立擴展及模型中宣告的索引"""
+    from app.database.db import create_indexes as create_model_indexes
+    
+    count = create_model_indexes()
+    logger.info(f"已確認 {count} 個索引")
+    print(f"\n=== 索引建立完成：{count} 個 ===")
+
 def main():
     """主函數，處理命令行參數並執行相應操作"""
     parser = argparse.ArgumentParser(description='航班資料同步工具')
@@ -526,8 +575,23 @@ def main():
     flights_only_parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'), help='查詢日期（YYYY-MM-DD 格式），預設為今天')
     flights_only_parser.add_argument('--days', type=int, default=1, help='查詢天數，預設為 1')
     
+    # 票價快照指令（記錄現行票價至價格歷史，可由排程每日執行）
+    subparsers.add_parser('price-snapshot', help='記錄所有未起飛航班的現行票價至價格歷史')
+    
+    # 索引建立指令（部署或模型新增索引後執行，可重複執行）
+    subparsers.add_parser('create-indexes', help='建立數據庫擴展及模型中宣告的索引')
+    
     args = parser.parse_args()
     
+    # 票價快照及索引建立只需數據庫連接，不需初始化API同步工具
+    if args.command == 'price-snapshot':
+        snapshot_prices()
+        return
+    
+    if args.command == 'create-indexes':
+        create_indexes()
+        return
+    
     # 初始化同步工具
     sync_tool = FlightDataSyncTool()
     
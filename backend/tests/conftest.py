@@ -0,0 +1,81 @@
+"""
+測試共用設定
+
+提供查詢計數工具及連接測試數據庫的應用 fixture；
+需要數據庫的測試以環境變數 TEST_DATABASE_URL 指定 PostgreSQL 測試庫，未設置時跳過
+"""
+import os
+import sys
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+# 添加 backend 目錄到路徑中，以便能夠導入應用模塊
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(current_dir, '..')))
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+# 數據庫連接於應用模塊導入時讀取，須在導入前設置
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
+# 測試所需的數據表
+TEST_TABLES = ('airlines', 'airports', 'flights', 'ticket_prices', 'price_history')
+
+@contextmanager
+def count_queries(connectable):
+    """
+    記錄區塊內送往數據庫的SQL語句
+
+    Args:
+        connectable: 要監聽的 Engine 或 Connection
+
+    Yields:
+        list: 執行過的SQL語句，區塊結束後可檢查其數量
+    """
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(connectable, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(connectable, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def app():
+    """連接測試數據庫的應用，測試結束後刪除測試數據表"""
+    if not TEST_DATABASE_URL:
+        pytest.skip('未設置 TEST_DATABASE_URL，跳過數據庫測試')
+
+    from app import create_app, airport_cache, airport_directory, route_airport_cache, airline_cache
+    from app.models.base import db
+    from app.database.db import create_extensions
+
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        tables = [db.metadata.tables[name] for name in TEST_TABLES]
+        # 三元組索引依賴的擴展不由 create_all 安裝
+        with db.engine.begin() as connection:
+            create_extensions(connection)
+        db.metadata.create_all(db.engine, tables=tables)
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.metadata.drop_all(db.engine, tables=tables)
+
+            # 進程內緩存不應跨測試保留
+            for response_cache in (airline_cache, airport_cache, route_airport_cache):
+                response_cache.clear()
+            airport_directory.clear()
+
+@pytest.fixture
+def client(app):
+    """測試客戶端"""
+    return app.test_client()
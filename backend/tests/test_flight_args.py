@@ -0,0 +1,31 @@
+"""
+航班查詢參數解析測試，不需數據庫
+"""
+import pytest
+from app.controllers.flight import is_number_arg, parse_code_list
+
+@pytest.mark.parametrize('value, expected', [
+    (None, True),
+    ('', True),
+    ('100', True),
+    ('-5', True),
+    ('12.50', True),
+    ('1e3', False),
+    ('12.', False),
+    ('abc', False),
+    ('10 ', False),
+])
+def test_is_number_arg(value, expected):
+    """未提供或為整數/小數時有效"""
+    assert is_number_arg(value) is expected
+
+@pytest.mark.parametrize('value, expected', [
+    (None, ()),
+    ('', ()),
+    ('BR', ('BR',)),
+    (' BR , CI ,,JL ', ('BR', 'CI', 'JL')),
+    (',', ()),
+])
+def test_parse_code_list(value, expected):
+    """去除空白及空項"""
+    assert parse_code_list(value) == expected
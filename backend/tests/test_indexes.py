@@ -0,0 +1,76 @@
+"""
+索引建立語句測試
+
+模型中宣告的索引由 create_indexes 在現有數據庫上建立，此處只檢查生成的語句，不需數據庫
+"""
+from sqlalchemy.dialects import postgresql
+
+def provisioned_indexes():
+    """以 PostgreSQL 方言生成的 {索引名稱: 建立語句}"""
+    from app.database.db import index_ddl
+    return {name: ddl for _, name, ddl in index_ddl(postgresql.dialect())}
+
+def test_index_ddl_is_concurrent_and_idempotent():
+    """所有索引都以 CONCURRENTLY 及 IF NOT EXISTS 建立，可在線上重複執行"""
+    indexes = provisioned_indexes()
+    assert indexes
+    for ddl in indexes.values():
+        assert ddl.startswith('CREATE INDEX CONCURRENTLY IF NOT EXISTS ')
+
+def test_flight_search_index_is_provisioned():
+    """航班搜索的複合索引"""
+    ddl = provisioned_indexes()['ix_flights_search']
+    assert 'ON flights (departure_airport_id, arrival_airport_id, scheduled_departure)' in ddl
+    assert 'INCLUDE (airline_id)' in ddl
+
+def test_trigram_indexes_and_extension_are_provisioned():
+    """名稱模糊搜索的三元組索引及其依賴的 pg_trgm 擴展"""
+    from app.database.db import REQUIRED_EXTENSIONS
+
+    indexes = provisioned_indexes()
+    assert 'pg_trgm' in REQUIRED_EXTENSIONS
+    for name, column in (('ix_airlines_name_zh_trgm', 'name_zh'), ('ix_airlines_name_en_trgm', 'name_en'),
+                         ('ix_common_phrases_phrase_trgm', 'phrase'),
+                         ('ix_common_phrases_translation_trgm', 'translation')):
+        assert f'USING gin ({column} gin_trgm_ops)' in indexes[name]
+
+def test_jsonb_containment_indexes_are_provisioned():
+    """偏好設定及詳細預報 @> 包含查詢使用的 GIN 索引"""
+    indexes = provisioned_indexes()
+    assert 'ON users USING gin (preferences jsonb_path_ops)' in indexes['ix_users_preferences_gin']
+    assert 'ON weather USING gin (detailed_forecast jsonb_path_ops)' in indexes['ix_weather_detailed_forecast_gin']
+
+def test_weather_forecast_index_is_provisioned():
+    """取最新天氣及預報範圍查詢使用的機場+預報日期+時間複合索引"""
+    ddl = provisioned_indexes()['ix_weather_airport_forecast']
+    assert 'ON weather (airport_id, forecast_date, forecast_time)' in ddl
+
+def test_common_phrase_language_partial_index_is_provisioned():
+    """常用短語按語言查詢的部分索引"""
+    ddl = provisioned_indexes()['ix_common_phrases_common_language']
+    assert ddl.endswith('ON common_phrases (language) WHERE is_common')
+
+def test_flight_prediction_indexes_are_provisioned():
+    """高風險航班及按狀態篩選的排序索引"""
+    indexes = provisioned_indexes()
+    assert 'ON flight_predictions (delay_probability)' in indexes['ix_flight_predictions_delay_probability']
+    assert ('ON flight_predictions (predicted_status, confidence_level)'
+            in indexes['ix_flight_predictions_status_confidence'])
+
+def test_user_history_time_indexes_are_provisioned():
+    """按用戶、平台、類型或航線取最新記錄的複合索引"""
+    indexes = provisioned_indexes()
+    for name, columns in (('ix_user_queries_user_time', 'user_queries (user_id, query_time)'),
+                          ('ix_user_queries_platform_time', 'user_queries (platform, query_time)'),
+                          ('ix_user_queries_type_time', 'user_queries (query_type, query_time)'),
+                          ('ix_user_search_history_user_time', 'user_search_history (user_id, search_time)'),
+                          ('ix_user_search_history_route_time',
+                           'user_search_history (departure_airport_id, arrival_airport_id, search_time)')):
+        assert f'ON {columns}' in indexes[name]
+
+def test_popular_statistics_indexes_are_provisioned():
+    """熱門查詢及熱門路線統計的時間範圍索引"""
+    indexes = provisioned_indexes()
+    assert indexes['ix_user_queries_time'].endswith('ON user_queries (query_time)')
+    assert indexes['ix_user_search_history_time_route'].endswith(
+        'ON user_search_history (search_time) INCLUDE (departure_airport_id, arrival_airport_id)')
@@ -0,0 +1,120 @@
+"""
+查詢次數回歸測試
+鎖定航班搜索及機場列表的查詢次數，避免重新出現逐筆延遲加載 (N+1)
+"""
+from datetime import date, datetime
+import pytest
+from conftest import count_queries
+
+@pytest.fixture
+def flights(app):
+    """建立兩家航空公司、三個機場及同一天的多個航班"""
+    from app.models import Airline, Airport, Flight
+    from app.models.base import db
+
+    db.session.add_all([
+        Airline(airline_id='BR', name_zh='長榮航空', name_en='EVA Air', is_domestic=True),
+        Airline(airline_id='CI', name_zh='中華航空', name_en='China Airlines', is_domestic=True),
+        Airport(airport_id='TPE', name_zh='桃園國際機場', name_en='Taoyuan', city='台北',
+                country='Taiwan', timezone='Asia/Taipei'),
+        Airport(airport_id='KHH', name_zh='高雄國際機場', name_en='Kaohsiung', city='高雄',
+                country='Taiwan', timezone='Asia/Taipei'),
+        Airport(airport_id='NRT', name_zh='成田國際機場', name_en='Narita', city='東京',
+                country='Japan', timezone='Asia/Tokyo'),
+    ])
+    db.session.commit()
+
+    db.session.add_all([
+        Flight(flight_number=f'{airline}{100 + hour}', airline_id=airline,
+               departure_airport_id='TPE', arrival_airport_id='NRT',
+               scheduled_departure=datetime(2025, 4, 7, hour), scheduled_arrival=datetime(2025, 4, 7, hour + 3))
+        for airline in ('BR', 'CI') for hour in range(6, 18, 2)
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+def test_search_flights_query_count(app, flights):
+    """航班搜索：一次航班查詢加上航空公司、起降機場及票價各一次批量加載"""
+    from app.models import Flight
+    from app.models.base import db
+
+    with count_queries(db.engine) as queries:
+        result = Flight.search_flights('TPE', 'NRT', date(2025, 4, 7))
+        names = [(flight.airline.name_zh, flight.departure_airport.city, flight.arrival_airport.city)
+                 for flight in result]
+
+    assert len(names) == 12
+    assert len(queries) <= 5
+
+def test_search_round_trip_query_count(app, flights):
+    """往返搜索：去程與回程以同一次查詢取得"""
+    from app.models import Flight
+    from app.models.base import db
+
+    db.session.add(Flight(flight_number='BR200', airline_id='BR',
+                          departure_airport_id='NRT', arrival_airport_id='TPE',
+                          scheduled_departure=datetime(2025, 4, 10, 9), scheduled_arrival=datetime(2025, 4, 10, 12)))
+    db.session.commit()
+    db.session.expunge_all()
+
+    with count_queries(db.engine) as queries:
+        outbound, inbound = Flight.search_flights('TPE', 'NRT', date(2025, 4, 7), date(2025, 4, 10))
+
+    assert len(outbound) == 12
+    assert [flight.flight_number for flight in inbound] == ['BR200']
+    assert len(queries) <= 5
+
+def test_search_result_ticket_prices_preloaded(app, flights):
+    """搜索結果的票價隨航班批量加載，存取時不再查詢"""
+    from decimal import Decimal
+    from app.models import Flight, TicketPrice
+    from app.models.base import db
+
+    for flight in Flight.query.all():
+        db.session.add(TicketPrice(flight_id=flight.flight_id, class_type='經濟', base_price=Decimal('5000')))
+    db.session.commit()
+    db.session.expunge_all()
+
+    result = Flight.search_flights('TPE', 'NRT', date(2025, 4, 7))
+    with count_queries(db.engine) as queries:
+        prices = [[price.base_price for price in flight.ticket_prices] for flight in result]
+
+    assert prices == [[Decimal('5000')]] * 12
+    assert queries == []
+
+def test_airport_list_query_count(client, flights):
+    """機場列表：首次請求只查詢一次，之後由緩存返回"""
+    from app.models.base import db
+
+    with count_queries(db.engine) as queries:
+        response = client.get('/api/airports/')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
+    assert len(queries) <= 1
+
+    with count_queries(db.engine) as queries:
+        for url in ('/api/airports/', '/api/airports/taiwan', '/api/airports/TPE', '/api/airports/country/Japan'):
+            assert client.get(url).status_code == 200
+    assert queries == []
+
+def test_update_price_query_count(app, flights):
+    """更新價格：歷史記錄與價格更新合併為一條語句"""
+    from decimal import Decimal
+    from app.models import Flight, TicketPrice, PriceHistory
+    from app.models.base import db
+
+    flight = Flight.query.first()
+    price = TicketPrice(flight_id=flight.flight_id, class_type='經濟', base_price=Decimal('5000'), available_seats=10)
+    db.session.add(price)
+    db.session.commit()
+    db.session.refresh(price)
+
+    with count_queries(db.engine) as queries:
+        price.update_price(Decimal('4500'))
+    assert len(queries) == 1
+
+    history = PriceHistory.query.filter_by(flight_id=flight.flight_id).one()
+    assert history.price == Decimal('5000')
+    db.session.refresh(price)
+    assert price.base_price == Decimal('4500')
+    assert price.available_seats == 10
@@ -0,0 +1,91 @@
+"""
+並發搜索合併測試
+
+以替換的 _search_flights 模擬數據庫查詢，不需數據庫
+"""
+import asyncio
+import pytest
+from app.services.search_service import SearchService
+
+SEARCH_ARGS = ('TPE', 'NRT', '2025-04-07')
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    """替換實際查詢，記錄調用次數並在 release 設置後返回"""
+    state = {'calls': 0, 'error': None}
+
+    async def search(*args):
+        state['calls'] += 1
+        await state['release'].wait()
+        if state['error']:
+            raise state['error']
+        return {'call': state['calls']}
+
+    monkeypatch.setattr(SearchService, '_search_flights', staticmethod(search))
+    yield state
+    assert SearchService._inflight == {}
+
+async def start_searches(state, count):
+    """發起多個相同的搜索，並等待它們都已進入等待狀態"""
+    state['release'] = asyncio.Event()
+    tasks = [asyncio.create_task(SearchService.search_flights(*SEARCH_ARGS)) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks
+
+def test_concurrent_identical_searches_share_one_query(fake_search):
+    """相同參數的並發搜索只執行一次查詢並共用結果"""
+    async def run():
+        tasks = await start_searches(fake_search, 5)
+        fake_search['release'].set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(run())
+    assert fake_search['calls'] == 1
+    assert results == [{'call': 1}] * 5
+
+def test_leader_exception_reaches_followers(fake_search):
+    """查詢失敗時所有等待中的請求收到同一異常"""
+    fake_search['error'] = ValueError('db down')
+
+    async def run():
+        tasks = await start_searches(fake_search, 3)
+        fake_search['release'].set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert fake_search['calls'] == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_cancelled_leader_does_not_fail_followers(fake_search):
+    """發起搜索的請求被取消時，等待中的請求自行重新搜索"""
+    async def run():
+        leader, *followers = await start_searches(fake_search, 3)
+        leader.cancel()
+        # 讓等待中的請求收到取消並重新合併為一次搜索
+        for _ in range(5):
+            await asyncio.sleep(0)
+        fake_search['release'].set()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    results = asyncio.run(run())
+    assert fake_search['calls'] == 2
+    assert results == [{'call': 2}] * 2
+
+def test_cancelled_follower_does_not_cancel_search(fake_search):
+    """等待中的請求被取消不影響進行中的搜索"""
+    async def run():
+        leader, follower, other = await start_searches(fake_search, 3)
+        follower.cancel()
+        await asyncio.sleep(0)
+        fake_search['release'].set()
+        results = await asyncio.gather(leader, other)
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return results
+
+    results = asyncio.run(run())
+    assert fake_search['calls'] == 1
+    assert results == [{'call': 1}] * 2
@@ -0,0 +1,172 @@
+"""
+工具層單元測試
+
+響應緩存、查詢緩存、背景任務及JSON串流，均不需數據庫
+"""
+import pytest
+from flask import Flask, jsonify
+from flask_caching import Cache
+from app.utils.json_stream import stream_json
+from app.utils.query_cache import QueryCache
+from app.utils.response_cache import ResponseCache, etag_cached
+from app.utils.task_runner import TaskRunner
+
+@pytest.fixture
+def flask_app():
+    """不連接數據庫的最小應用"""
+    app = Flask(__name__)
+    app.json.sort_keys = False
+    return app
+
+def test_response_cache_returns_304_for_matching_etag(flask_app):
+    """緩存的響應帶 ETag，If-None-Match 相符時返回 304"""
+    response_cache = ResponseCache(timeout=60)
+
+    @flask_app.route('/airports')
+    def airports():
+        body = response_cache.get('all') or response_cache.set('all', [{'id': 'TPE'}])
+        return response_cache.response(body)
+
+    client = flask_app.test_client()
+    first = client.get('/airports')
+    assert first.status_code == 200
+    assert first.get_json() == [{'id': 'TPE'}]
+    assert first.headers['ETag']
+
+    second = client.get('/airports', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+
+def test_response_cache_expires_and_clears(flask_app, monkeypatch):
+    """過期或清除後不再返回緩存"""
+    import app.utils.response_cache as response_cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, 'monotonic', lambda: now[0])
+    response_cache = ResponseCache(timeout=60)
+
+    with flask_app.app_context():
+        cached = response_cache.set('all', [1, 2])
+    assert response_cache.get('all') == cached
+
+    now[0] += 61
+    assert response_cache.get('all') is None
+
+    with flask_app.app_context():
+        response_cache.set('all', [1, 2])
+    response_cache.clear()
+    assert response_cache.get('all') is None
+
+def test_etag_cached_serves_cached_view_with_etag(flask_app):
+    """etag_cached 只執行一次視圖，緩存命中時同樣支持 304"""
+    cache = Cache(flask_app, config={'CACHE_TYPE': 'SimpleCache'})
+    calls = []
+
+    @flask_app.route('/routes')
+    @etag_cached(cache, timeout=60)
+    def routes():
+        calls.append(1)
+        return jsonify({'routes': ['TPE-NRT']})
+
+    client = flask_app.test_client()
+    first = client.get('/routes')
+    second = client.get('/routes')
+    assert first.get_json() == second.get_json() == {'routes': ['TPE-NRT']}
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert len(calls) == 1
+
+    not_modified = client.get('/routes', headers={'If-None-Match': first.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert len(calls) == 1
+
+def test_query_cache_memoizes_by_arguments():
+    """相同參數只執行一次，不同參數分別緩存"""
+    query_cache = QueryCache(timeout=60)
+    calls = []
+
+    @query_cache.memoize
+    def popular(days=30, limit=10):
+        calls.append((days, limit))
+        return [days, limit]
+
+    assert popular(30) == popular(30) == [30, 10]
+    assert popular(7, limit=5) == [7, 5]
+    assert calls == [(30, 10), (7, 5)]
+
+def test_query_cache_expires_and_evicts(monkeypatch):
+    """過期條目重新查詢；超出容量時先淘汰過期條目，再淘汰最早寫入的條目"""
+    import app.utils.query_cache as query_cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(query_cache_module.time, 'monotonic', lambda: now[0])
+    query_cache = QueryCache(timeout=60, max_size=2)
+    calls = []
+
+    @query_cache.memoize
+    def lookup(value):
+        calls.append(value)
+        return value
+
+    lookup(1)
+    now[0] += 61
+    lookup(1)
+    assert calls == [1, 1]
+
+    lookup(2)
+    lookup(3)
+    assert len(query_cache.entries) == 2
+    lookup(2)
+    lookup(3)
+    assert calls == [1, 1, 2, 3]
+
+    # 1 為最早寫入的條目，已被淘汰
+    lookup(1)
+    assert calls == [1, 1, 2, 3, 1]
+
+    query_cache.clear()
+    assert query_cache.entries == {}
+
+def test_task_runner_records_success_and_error():
+    """任務狀態記錄成功結果及錯誤信息"""
+    runner = TaskRunner(max_workers=1)
+
+    def fail():
+        raise RuntimeError('sync failed')
+
+    ok_id = runner.submit(lambda a, b: a + b, 1, b=2)
+    error_id = runner.submit(fail)
+    runner.executor.shutdown(wait=True)
+
+    ok = runner.get_status(ok_id)
+    assert ok['status'] == TaskRunner.STATUS_SUCCESS
+    assert ok['result'] == 3
+    assert ok['finished_at']
+
+    error = runner.get_status(error_id)
+    assert error['status'] == TaskRunner.STATUS_ERROR
+    assert error['error'] == 'sync failed'
+    assert runner.get_status('missing') is None
+
+def test_task_runner_keeps_latest_records():
+    """超過記錄上限時移除最舊的任務狀態"""
+    runner = TaskRunner(max_workers=1, max_records=2)
+    task_ids = [runner.submit(lambda value=value: value) for value in range(3)]
+    runner.executor.shutdown(wait=True)
+
+    assert runner.get_status(task_ids[0]) is None
+    assert [runner.get_status(task_id)['result'] for task_id in task_ids[1:]] == [1, 2]
+
+def test_stream_json_matches_jsonify(flask_app):
+    """串流輸出的位元組與 jsonify 一致"""
+    data = {
+        'flights': [{'flight_number': 'BR198', 'price': 12345.5, 'name': '長榮航空'}, {'flight_number': 'CI100'}],
+        'meta': {'total': 2, 'empty': [], 'nested': {'ok': True, 'none': None}},
+        'codes': ('TPE', 'NRT')
+    }
+
+    with flask_app.test_request_context():
+        expected = jsonify(data).get_data()
+        streamed = b''.join(stream_json(data).response)
+
+    # jsonify 在末尾附加換行，其餘內容一致
+    assert streamed == expected.rstrip(b'\n')